@@ -1,58 +1,188 @@
 # app.py
+import asyncio
+import atexit
+import hmac
+import logging
 import os
+import queue
+import re
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from types import ModuleType
+from logging.handlers import QueueHandler, QueueListener
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import orjson
 from fastapi import FastAPI, HTTPException, Request, status
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, ORJSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.staticfiles import StaticFiles
+from starlette.types import ASGIApp, Receive, Scope, Send
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-from scripts.one_shot import (
-    fetch_last_sold_once,
-    fetch_sales_snapshot,
-    fetch_active_listings,
-    fetch_pages_in_product,
-    fetch_active_listings_in_page,
-    debug_login_only,
-    debug_proxy_ip,
-    debug_cookies,
-    debug_localstorage,
-    debug_visit,
-    debug_trace,
-    debug_myaccount,
-    debug_js,
+# ---- Logging ----
+# Request and scraper threads only enqueue records; one listener thread does the
+# blocking stderr writes. Access logging is disabled at the uvicorn level.
+class _JsonLogFormatter(logging.Formatter):
+    """One JSON object per line (ts, level, logger, msg, exc) for log shippers."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return orjson.dumps(entry).decode()
+
+_log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+_log_listener = QueueListener(_log_queue, logging.StreamHandler(), respect_handler_level=True)
+# The queue handler formats each record before enqueueing it (QueueHandler.prepare),
+# so the formatter lives there; LOG_FORMAT=json switches to one JSON object per line.
+_log_handler = QueueHandler(_log_queue)
+if (os.getenv("LOG_FORMAT") or "").lower() == "json":
+    _log_handler.setFormatter(_JsonLogFormatter())
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(name)s - %(message)s",
+    handlers=[_log_handler],
 )
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
+SERVICE_NAME = "tcgplayer-scraper"
+SERVICE_VERSION = "1.4.0-public"
+
+@asynccontextmanager
+async def _lifespan(_app: FastAPI):
+    yield
+    # Each scrape thread owns its Chromium (sync Playwright is thread-bound), so the
+    # scraper module hands every pool thread its own close task
+    if _scrapers.cache_info().currsize:
+        await asyncio.get_running_loop().run_in_executor(
+            None, _scrapers().close_all_browser_sessions, ((SCRAPE_POOL, SCRAPE_WORKERS),))
+
+# Machine-to-machine API: no OpenAPI schema or docs UI to build or expose
+app = FastAPI(
+    lifespan=_lifespan,
+    title=SERVICE_NAME,
+    version=SERVICE_VERSION,
+    default_response_class=ORJSONResponse,
+    openapi_url=None,
+    docs_url=None,
+    redoc_url=None,
+)
+
+class _TTLCache:
+    """Bounded insertion-ordered dict whose entries expire after ttl_seconds."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: Dict[Any, Tuple[float, Any]] = {}
 
-app = FastAPI(title="tcgplayer-scraper", version="1.4.0-public")
+    def get(self, key: Any) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() - entry[0] >= self.ttl_seconds:
+            return None
+        return entry[1]
+
+    def set(self, key: Any, value: Any) -> None:
+        self._entries.pop(key, None)
+        if len(self._entries) >= self.max_entries:
+            # Dicts keep insertion order, so the first key is the oldest entry
+            self._entries.pop(next(iter(self._entries)))
+        self._entries[key] = (time.monotonic(), value)
+
+    def clear(self) -> None:
+        self._entries.clear()
 
 # ---- API Key Authentication ----
-API_KEY = os.getenv("API_KEY")
+# Kept only as bytes: the middleware compares raw header bytes and never decodes
+API_KEY_BYTES = (os.getenv("API_KEY") or "").encode("utf-8")
 
-if not API_KEY:
+if not API_KEY_BYTES:
     raise ValueError("API_KEY environment variable is not set. Please set it in your .env file.")
 
-@app.middleware("http")
-async def verify_api_key(request: Request, call_next):
-    """Verify API key for all requests except root endpoint."""
-    # Allow root endpoint without authentication for health checks
-    if request.url.path == "/":
-        return await call_next(request)
+# scripts.one_shot loads lazily (see _scrapers), so a setting it rejects at import is
+# checked here too; otherwise it would surface as a 500 on every scrape, not at startup.
+_screenshot_quality = (os.getenv("SCREENSHOT_QUALITY") or "").strip()
+if _screenshot_quality:
+    try:
+        _quality_ok = 0 <= int(_screenshot_quality) <= 100
+    except ValueError:
+        _quality_ok = False
+    if not _quality_ok:
+        raise ValueError(f"SCREENSHOT_QUALITY must be an integer between 0 and 100, got {_screenshot_quality!r}")
+
+# Raw header values that already passed validation, so repeat callers skip re-parsing
+API_KEY_CACHE_TTL_SECONDS = 300.0
+API_KEY_CACHE_MAX_ENTRIES = 1024
+
+_UNAUTHORIZED_BODY = orjson.dumps(
+    {"detail": "Invalid or missing API key. Include 'X-API-Key' header with your API key."}
+)
+
+class APIKeyASGIMiddleware:
+    """Pure ASGI API key check for all requests except the root endpoint."""
+
+    def __init__(self, app: ASGIApp, api_key_bytes: bytes):
+        self.app = app
+        self.api_key_bytes = api_key_bytes
+        self._validated = _TTLCache(API_KEY_CACHE_TTL_SECONDS, API_KEY_CACHE_MAX_ENTRIES)
 
-    # Check for API key in headers
-    api_key = request.headers.get("X-API-Key") or request.headers.get("Authorization")
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        # Allow root endpoint without authentication for health checks
+        if scope["type"] != "http" or scope["path"] == "/":
+            await self.app(scope, receive, send)
+            return
 
-    # Support Bearer token format
-    if api_key and api_key.startswith("Bearer "):
-        api_key = api_key[7:]
+        # Single pass over the raw (already lower-cased) header bytes; X-API-Key
+        # wins over Authorization, so stop as soon as a non-empty one is seen.
+        raw_key = b""
+        for name, value in scope["headers"]:
+            if name == b"x-api-key" and value:
+                raw_key = value
+                break
+            if name == b"authorization" and not raw_key:
+                raw_key = value
 
-    if api_key != API_KEY:
-        return JSONResponse(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            content={"detail": "Invalid or missing API key. Include 'X-API-Key' header with your API key."}
-        )
+        if not self._is_valid(raw_key):
+            await send({
+                "type": "http.response.start",
+                "status": status.HTTP_401_UNAUTHORIZED,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(_UNAUTHORIZED_BODY)).encode("ascii")),
+                ],
+            })
+            await send({"type": "http.response.body", "body": _UNAUTHORIZED_BODY})
+            return
 
-    return await call_next(request)
+        await self.app(scope, receive, send)
+
+    def _is_valid(self, raw_key: bytes) -> bool:
+        if self._validated.get(raw_key):
+            return True
+
+        # Support Bearer token format
+        api_key = raw_key[7:] if raw_key.startswith(b"Bearer ") else raw_key
+        if not hmac.compare_digest(api_key, self.api_key_bytes):
+            return False
+
+        self._validated.set(raw_key, True)
+        return True
+
+app.add_middleware(APIKeyASGIMiddleware, api_key_bytes=API_KEY_BYTES)
 
 # ---- CORS: allow all (public testing) ----
 app.add_middleware(
@@ -63,93 +193,252 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-@app.get("/")
+# Health check body never changes, so encode it once at import time
+_ROOT_RESPONSE = Response(
+    content=orjson.dumps({"ok": True, "service": SERVICE_NAME, "version": SERVICE_VERSION}),
+    media_type="application/json",
+)
+
+@app.get("/", response_model=None, response_class=Response)
 def root():
-    return {"ok": True, "service": "tcgplayer-scraper", "version": "1.4.0-public"}
+    return _ROOT_RESPONSE
 
-# ---- Public API ----
+# ---- Scraper threadpool ----
+# Playwright's sync API blocks for seconds per call, so scrapes run on a dedicated
+# pool instead of FastAPI's shared threadpool; health checks stay responsive.
+# Each worker thread keeps its own warm Chromium, so size this with memory in mind.
+SCRAPE_WORKERS = int(os.getenv("SCRAPE_WORKERS", "4"))
+SCRAPE_POOL = ThreadPoolExecutor(max_workers=SCRAPE_WORKERS, thread_name_prefix="scrape")
 
-@app.post("/last-sold")
-def last_sold(payload: dict):
-    url = payload.get("url")
-    if not url:
-        raise HTTPException(status_code=400, detail="Missing url")
-    return JSONResponse(fetch_last_sold_once(url))
+@lru_cache(maxsize=None)
+def _scrapers() -> ModuleType:
+    # Deferred so Playwright/lxml load on first use (inside a scrape
+    # worker) rather than at import/fork time of every server process.
+    import scripts.one_shot
+    return scripts.one_shot
+
+def _call_scraper(name: str, *args: Any) -> Dict[str, Any]:
+    return getattr(_scrapers(), name)(*args)
+
+# Identical scrapes already running; concurrent duplicates await the same result
+_inflight: Dict[Tuple[Any, ...], "asyncio.Future[Dict[str, Any]]"] = {}
+
+async def _run_scrape(name: str, *args: Any) -> Dict[str, Any]:
+    key = (name, *args)
+    fut = _inflight.get(key)
+    if fut is None:
+        loop = asyncio.get_running_loop()
+        fut = loop.run_in_executor(SCRAPE_POOL, _call_scraper, name, *args)
+        _inflight[key] = fut
+        fut.add_done_callback(lambda _: _inflight.pop(key, None))
+    # Shield so one disconnecting client does not cancel the scrape for the others
+    return await asyncio.shield(fut)
 
-@app.post("/sales-snapshot")
-def sales_snapshot(payload: dict):
+# ---- Request parsing ----
+# Bodies are decoded with orjson directly instead of going through FastAPI's
+# dict-body validation; handlers only need a couple of scalar fields.
+_URL_RE = re.compile(r"https?://\S+", re.I)
+_PRODUCT_ID_RE = re.compile(r"[0-9]{1,10}")
+# Upper bound on pages/URLs scraped by one batch call
+BATCH_MAX_ITEMS = 20
+
+async def _read_payload(request: Request) -> Dict[str, Any]:
+    try:
+        payload = orjson.loads(await request.body())
+    except orjson.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="Invalid JSON body")
+    if not isinstance(payload, dict):
+        raise HTTPException(status_code=400, detail="JSON body must be an object")
+    return payload
+
+def _require_url(payload: Dict[str, Any]) -> str:
     url = payload.get("url")
     if not url:
         raise HTTPException(status_code=400, detail="Missing url")
-    return JSONResponse(fetch_sales_snapshot(url))
+    if not isinstance(url, str) or not _URL_RE.fullmatch(url):
+        raise HTTPException(status_code=400, detail="Invalid url")
+    return url
 
-@app.post("/active-listings")
-def active_listings(payload: dict):
-    product_id = payload.get("productId") or payload.get("product_id")
-    if not product_id:
-        raise HTTPException(status_code=400, detail="Missing productId")
-    return JSONResponse(fetch_active_listings(str(product_id)))
+def _require_urls(payload: Dict[str, Any]) -> Tuple[str, ...]:
+    urls = payload.get("urls")
+    if not isinstance(urls, list) or not urls:
+        raise HTTPException(status_code=400, detail="Missing urls list")
+    if len(urls) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_ITEMS} urls per batch")
+    return tuple(_require_url({"url": url}) for url in urls)
 
-@app.post("/pages-in-product")
-def pages_in_product(payload: dict):
+def _require_product_id(payload: Dict[str, Any]) -> str:
     product_id = payload.get("productId") or payload.get("product_id")
     if not product_id:
         raise HTTPException(status_code=400, detail="Missing productId")
-    return JSONResponse(fetch_pages_in_product(str(product_id)))
+    product_id = str(product_id)
+    if not _PRODUCT_ID_RE.fullmatch(product_id):
+        raise HTTPException(status_code=400, detail="Invalid productId")
+    return product_id
 
-@app.post("/active-listings-in-page")
-def active_listings_in_page(payload: dict):
-    product_id = payload.get("productId") or payload.get("product_id")
+def _parse_page_number(page: Any) -> int:
+    if isinstance(page, bool):
+        raise HTTPException(status_code=400, detail="Invalid page number")
+    try:
+        return int(page)
+    except (TypeError, ValueError, OverflowError):
+        raise HTTPException(status_code=400, detail="Invalid page number")
+
+# ---- Public API ----
+# A product's page count changes slowly; successful lookups are reused for a couple
+# of minutes. Send {"force": true} to bypass, or clear via /debug/pages-cache/clear.
+PAGES_CACHE_TTL_SECONDS = 120.0
+PAGES_CACHE_MAX_ENTRIES = 2048
+_pages_cache = _TTLCache(PAGES_CACHE_TTL_SECONDS, PAGES_CACHE_MAX_ENTRIES)
+
+@app.post("/last-sold", response_model=None, response_class=ORJSONResponse)
+async def last_sold(request: Request):
+    url = _require_url(await _read_payload(request))
+    return ORJSONResponse(await _run_scrape("fetch_last_sold_once", url))
+
+@app.post("/sales-snapshot", response_model=None, response_class=ORJSONResponse)
+async def sales_snapshot(request: Request):
+    url = _require_url(await _read_payload(request))
+    return ORJSONResponse(await _run_scrape("fetch_sales_snapshot", url))
+
+@app.post("/sales-summary", response_model=None, response_class=ORJSONResponse)
+async def sales_summary(request: Request):
+    url = _require_url(await _read_payload(request))
+    return ORJSONResponse(await _run_scrape("fetch_sales_summary", url))
+
+@app.post("/last-sold/batch", response_model=None, response_class=ORJSONResponse)
+async def last_sold_batch(request: Request):
+    urls = _require_urls(await _read_payload(request))
+    return ORJSONResponse(await _run_scrape("fetch_last_sold_batch", urls))
+
+@app.post("/sales-snapshot/batch", response_model=None, response_class=ORJSONResponse)
+async def sales_snapshot_batch(request: Request):
+    urls = _require_urls(await _read_payload(request))
+    return ORJSONResponse(await _run_scrape("fetch_snapshots", urls))
+
+@app.post("/sales-summary/batch", response_model=None, response_class=ORJSONResponse)
+async def sales_summary_batch(request: Request):
+    urls = _require_urls(await _read_payload(request))
+    return ORJSONResponse(await _run_scrape("fetch_sales_summaries", urls))
+
+@app.post("/active-listings", response_model=None, response_class=ORJSONResponse)
+async def active_listings(request: Request):
+    payload = await _read_payload(request)
+    product_id = _require_product_id(payload)
+    return ORJSONResponse(await _run_scrape("fetch_active_listings", product_id))
+
+@app.post("/pages-in-product", response_model=None, response_class=ORJSONResponse)
+async def pages_in_product(request: Request):
+    payload = await _read_payload(request)
+    product_id = _require_product_id(payload)
+    if not payload.get("force"):
+        cached = _pages_cache.get(product_id)
+        if cached is not None:
+            return ORJSONResponse(cached)
+    result = await _run_scrape("fetch_pages_in_product", product_id)
+    if not result.get("error"):
+        _pages_cache.set(product_id, result)
+    return ORJSONResponse(result)
+
+@app.post("/active-listings-in-page", response_model=None, response_class=ORJSONResponse)
+async def active_listings_in_page(request: Request):
+    payload = await _read_payload(request)
+    product_id = _require_product_id(payload)
     page = payload.get("page") or payload.get("pageNumber")
-    if not product_id:
-        raise HTTPException(status_code=400, detail="Missing productId")
     if page is None:
         raise HTTPException(status_code=400, detail="Missing page number")
-    try:
-        page_num = int(page)
-    except (ValueError, TypeError):
-        raise HTTPException(status_code=400, detail="Invalid page number")
-    return JSONResponse(fetch_active_listings_in_page(str(product_id), page_num))
+    page_num = _parse_page_number(page)
+    return ORJSONResponse(await _run_scrape("fetch_active_listings_in_page", product_id, page_num))
+
+@app.post("/active-listings/batch", response_model=None, response_class=ORJSONResponse)
+async def active_listings_batch(request: Request):
+    payload = await _read_payload(request)
+    product_id = _require_product_id(payload)
+    pages = payload.get("pages")
+    if not isinstance(pages, list) or not pages:
+        raise HTTPException(status_code=400, detail="Missing pages list")
+    if len(pages) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_ITEMS} pages per batch")
+    page_nums = tuple(_parse_page_number(page) for page in pages)
+    return ORJSONResponse(await _run_scrape("fetch_active_listings_pages", product_id, page_nums))
 
 # ---- Debug / Diagnostics (PUBLIC in this build) ----
 
-@app.post("/debug/login")
-def debug_login():
-    return JSONResponse(debug_login_only())
+@app.post("/debug/login", response_model=None, response_class=ORJSONResponse)
+async def debug_login():
+    return ORJSONResponse(await _run_scrape("debug_login_only"))
+
+@app.post("/debug/pages-cache/clear", response_model=None, response_class=ORJSONResponse)
+async def _clear_pages_cache():
+    _pages_cache.clear()
+    return {"ok": True}
+
+@app.get("/debug/proxy-ip", response_model=None, response_class=ORJSONResponse)
+async def _proxy_ip():
+    return ORJSONResponse(await _run_scrape("debug_proxy_ip"))
+
+@app.get("/debug/cookies", response_model=None, response_class=ORJSONResponse)
+async def _cookies():
+    return ORJSONResponse(await _run_scrape("debug_cookies"))
 
-@app.get("/debug/proxy-ip")
-def _proxy_ip():
-    return JSONResponse(debug_proxy_ip())
+@app.get("/debug/localstorage", response_model=None, response_class=ORJSONResponse)
+async def _localstorage():
+    return ORJSONResponse(await _run_scrape("debug_localstorage"))
 
-@app.get("/debug/cookies")
-def _cookies():
-    return JSONResponse(debug_cookies())
+@app.get("/debug/visit", response_model=None, response_class=ORJSONResponse)
+async def _visit(url: str):
+    return ORJSONResponse(await _run_scrape("debug_visit", url))
 
-@app.get("/debug/localstorage")
-def _localstorage():
-    return JSONResponse(debug_localstorage())
+@app.get("/debug/trace", response_model=None, response_class=ORJSONResponse)
+async def _trace(url: str):
+    return ORJSONResponse(await _run_scrape("debug_trace", url))
 
-@app.get("/debug/visit")
-def _visit(url: str):
-    return JSONResponse(debug_visit(url))
+@app.get("/debug/myaccount", response_model=None, response_class=ORJSONResponse)
+async def _myaccount():
+    return ORJSONResponse(await _run_scrape("debug_myaccount"))
 
-@app.get("/debug/trace")
-def _trace(url: str):
-    return JSONResponse(debug_trace(url))
+@app.get("/debug/js", response_model=None, response_class=ORJSONResponse)
+async def _js():
+    return ORJSONResponse(await _run_scrape("debug_js"))
 
-@app.get("/debug/myaccount")
-def _myaccount():
-    return JSONResponse(debug_myaccount())
+# Artifact names are timestamped + uuid-suffixed, so a given path never changes. They
+# hold logged-in pages behind the API key: only the client's own cache may keep them.
+ARTIFACT_CACHE_CONTROL = "private, max-age=60"
 
-@app.get("/debug/js")
-def _js():
-    return JSONResponse(debug_js())
+def _file_response(path: str, headers: Optional[Dict[str, str]] = None) -> FileResponse:
+    # Stat once and hand the result to FileResponse so it does not re-stat; Starlette
+    # then streams via the server's pathsend/sendfile path where available.
+    try:
+        stat_result = os.stat(path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="not found")
+    return FileResponse(path, stat_result=stat_result, headers=headers)
 
 # Simple file server for artifacts under /app/debug
-@app.get("/debug/artifact")
+ARTIFACT_ROOT = Path("/app/debug").resolve()
+
+# Bulk artifact reads go through StaticFiles (Range/ETag/If-Modified-Since, sendfile);
+# still behind APIKeyASGIMiddleware like every non-root path.
+app.mount("/debug/files", StaticFiles(directory=ARTIFACT_ROOT, check_dir=False), name="debug-files")
+
+@app.get("/debug/artifact", response_model=None, response_class=FileResponse)
 def artifact(path: str):
-    if not path.startswith("/app/debug/"):
+    # Resolve before checking so "..", symlinks and prefix tricks cannot escape the root
+    resolved = Path(path).resolve()
+    if not resolved.is_relative_to(ARTIFACT_ROOT):
         raise HTTPException(status_code=400, detail="invalid path")
-    if not os.path.exists(path):
-        raise HTTPException(status_code=404, detail="not found")
-    return FileResponse(path)
+    return _file_response(str(resolved), headers={"Cache-Control": ARTIFACT_CACHE_CONTROL})
+
+def _latest_artifact_response(kind: str) -> FileResponse:
+    path = _scrapers().latest_artifact(kind)
+    if not path:
+        raise HTTPException(status_code=404, detail=f"no {kind} artifact yet")
+    return _file_response(path)
+
+@app.get("/debug/last-screenshot", response_model=None, response_class=FileResponse)
+def last_screenshot():
+    return _latest_artifact_response("screenshot")
+
+@app.get("/debug/last-html", response_model=None, response_class=FileResponse)
+def last_html():
+    return _latest_artifact_response("html")
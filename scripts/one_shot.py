@@ -5,36 +5,55 @@ import time
 import base64
 import pathlib
 import uuid
-import json
 from datetime import datetime, timezone
-from typing import List, Dict, Any, Optional, Set
+from typing import Callable, List, Dict, Any, NamedTuple, Optional, Sequence, Set, Tuple, Union
 from urllib.parse import urlparse, urljoin, parse_qsl, urlencode
-import hashlib
-
-from bs4 import BeautifulSoup
+import atexit
+import functools
+import logging
+import queue
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
+
+import lxml.etree
+import lxml.html
+import orjson
 from playwright.sync_api import sync_playwright, TimeoutError as PWTimeout, Page
 
+logger = logging.getLogger(__name__)
+
 STATE_PATH = "/app/state.json"
 DEBUG_DIR  = "/app/debug"
 os.makedirs(DEBUG_DIR, exist_ok=True)
 
+# When a login was last verified, written only by _persist_state. A state.json from
+# STATE_B64 (or copied in by hand) has no such record and is never trusted on age alone.
+STATE_VERIFIED_PATH = f"{STATE_PATH}.verified"
+
 # Hydrate /app/state.json from STATE_B64 if missing
 if not pathlib.Path(STATE_PATH).exists():
     _b64 = os.getenv("STATE_B64")
     if _b64:
         try:
             data = base64.b64decode(_b64.encode("ascii"))
-            _ = json.loads(data.decode("utf-8"))
+            orjson.loads(data)
             with open(STATE_PATH, "wb") as f:
                 f.write(data)
-            print("[boot] wrote storage state from STATE_B64")
+            # A verification record left over from an earlier state does not cover this one
+            pathlib.Path(STATE_VERIFIED_PATH).unlink(missing_ok=True)
+            logger.info("[boot] wrote storage state from STATE_B64")
         except Exception as e:
-            print("[boot] failed to write state from STATE_B64:", e)
+            logger.error("[boot] failed to write state from STATE_B64: %s", e)
 
-def _env_int(name: str, default: int) -> int:
+# Whether STATE_PATH holds a saved storage state; flipped by _do_login_flow so
+# context setup never has to stat the file.
+_STATE_SAVED = pathlib.Path(STATE_PATH).exists()
+
+def _env_int(name: str, default: int, minimum: int = 1) -> int:
     try:
         v = int((os.getenv(name) or "").strip())
-        return v if v > 0 else default
+        return v if v >= minimum else default
     except Exception:
         return default
 
@@ -42,6 +61,24 @@ NAV_TIMEOUT_MS   = _env_int("TIMEOUT_MS", 60000)
 SNAPSHOT_WAIT_MS = _env_int("SNAPSHOT_WAIT_MS", 45000)
 RETRY_TIMES      = _env_int("RETRY_TIMES", 3)
 FORCE_STATE_ONLY = (os.getenv("FORCE_STATE_ONLY") == "1")
+STATE_FRESH_HOURS = _env_int("STATE_FRESH_HOURS", 12)
+FULL_PAGE_SCREENSHOTS = (os.getenv("FULL_PAGE_SCREENSHOTS") == "1")
+# JPEG by default; SCREENSHOT_FORMAT=png for lossless captures when pixels matter
+SCREENSHOT_FORMAT = "png" if (os.getenv("SCREENSHOT_FORMAT") or "").lower() == "png" else "jpeg"
+# JPEG quality 0-100; parsed strictly, since _env_int would quietly swap a typo (or 0) for the default
+SCREENSHOT_QUALITY = int((os.getenv("SCREENSHOT_QUALITY") or "40").strip())
+if not 0 <= SCREENSHOT_QUALITY <= 100:
+    raise ValueError(f"SCREENSHOT_QUALITY must be between 0 and 100, got {SCREENSHOT_QUALITY}")
+# Try a plain HTTP GET (context cookies, no rendering) before loading the page for a
+# last-sold price; only pays off where the price is server-rendered, hence opt-in.
+LAST_SOLD_HTTP_FIRST = (os.getenv("LAST_SOLD_HTTP_FIRST") == "1")
+# Scrape-triggered logins only leave artifacts when they fail, unless LOGIN_ARTIFACTS=1
+LOGIN_ARTIFACTS = (os.getenv("LOGIN_ARTIFACTS") == "1")
+AUTH_COOKIE_NAMES = frozenset(
+    x.strip() for x in (os.getenv("AUTH_COOKIE_NAMES") or "TCGAuthTicket_Production").split(",") if x.strip()
+)
+# Opt-in on-disk Chromium profiles (cookies, localStorage, HTTP cache survive restarts)
+BROWSER_PROFILE_DIR = (os.getenv("BROWSER_PROFILE_DIR") or "").strip()
 USER_AGENT       = os.getenv("USER_AGENT") or (
     "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
     "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
@@ -50,6 +87,107 @@ NAV_PLATFORM = os.getenv("NAV_PLATFORM", "MacIntel")
 NAV_LANGS    = os.getenv("NAV_LANGS", "en-US,en")
 MAX_LISTING_PAGES   = _env_int("LISTING_MAX_PAGES", 20)
 LISTING_PAGE_WAIT_MS = _env_int("LISTING_PAGE_WAIT_MS", 20000)
+READY_SELECTOR_WAIT_MS = _env_int("READY_SELECTOR_WAIT_MS", 6000)
+QUIET_IDLE_MS    = _env_int("QUIET_IDLE_MS", 400)
+QUIET_TIMEOUT_MS = _env_int("QUIET_TIMEOUT_MS", 4000)
+QUIET_POLL_MS    = 100
+BATCH_CONCURRENCY = _env_int("BATCH_CONCURRENCY", 4)
+BATCH_JITTER_MS   = 100
+# Consecutive origin failures (nav timeout / challenge) that open the circuit; 0 disables
+BREAKER_FAILURES  = _env_int("BREAKER_FAILURES", 5, minimum=0)
+BREAKER_RESET_SECONDS = _env_int("BREAKER_RESET_SECONDS", 60)
+
+# Headless scraping needs none of GPU, extensions, sync, translate or background
+# networking; skipping them shortens launch and trims per-browser memory.
+CHROMIUM_ARGS = [
+    "--no-sandbox",
+    "--disable-dev-shm-usage",
+    "--disable-gpu",
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-sync",
+    "--disable-translate",
+    "--metrics-recording-only",
+    "--mute-audio",
+    "--no-first-run",
+    "--no-default-browser-check",
+    "--disable-features=IsolateOrigins,site-per-process,TranslateUI",
+]
+
+# Asset/tracker blocking is on by default; BLOCK_ASSETS=0 loads pages exactly as a
+# browser would, for comparing debug artifacts against a real visit.
+BLOCK_ASSETS = (os.getenv("BLOCK_ASSETS", "1") != "0")
+# Stylesheets are only blocked on request: visibility checks (login, dialogs) can
+# depend on CSS, so BLOCK_STYLESHEETS=1 is opt-in.
+BLOCK_STYLESHEETS = (os.getenv("BLOCK_STYLESHEETS") == "1")
+BLOCKED_EXTENSIONS = "png|jpe?g|gif|webp|avif|svg|ico|woff2?|ttf|otf|eot|mp4|webm|mp3|m4a|ogg" + ("|css" if BLOCK_STYLESHEETS else "")
+# Matched by Playwright itself, so requests that do not match never reach Python
+BLOCKED_URL_RE = re.compile(
+    rf"\.(?:{BLOCKED_EXTENSIONS})(?:[?#]|$)"
+    r"|googletagmanager|google-analytics|doubleclick|segment\.(?:io|com)|hotjar|optimizely|facebook\.net"
+    r"|sentry\.io|browser\.sentry-cdn\.com|nr-data\.net|js-agent\.newrelic\.com",
+    re.I,
+)
+
+# Patterns used on every scrape, compiled once
+_MONEY_RE = re.compile(r"\$[0-9][0-9,]*\.?[0-9]{0,2}")
+# Label and the first amount after it in one scan of the rendered text
+_LABEL_MONEY_RE = re.compile(r"(?:Most\s+Recent\s+Sale|Last\s+Sold)[^$]{0,120}(\$[0-9][0-9,]*\.?[0-9]{0,2})", re.I)
+_SNAPSHOT_RE = re.compile(r"Sales\s+History\s+Snapshot", re.I)
+_DIGITS_RE = re.compile(r"\d+")
+_ANTIBOT_TITLE_RE = re.compile(r"access denied", re.I)
+_ANTIBOT_BODY_RE = re.compile(r"verify you are a human|are you human", re.I)
+# "label: value" lines; the label is everything before the line's first colon. The
+# pattern itself trims both sides and requires both non-empty, so matches need no cleanup.
+_KV_LINE_RE = re.compile(r"^[^\S\n]*([^\s:][^\n:]*?)[^\S\n]*:[^\S\n]*(\S[^\n]*?)[^\S\n]*$", re.M)
+_LAST_PATH_SEGMENT_RE = re.compile(r"/([^/]+)$")
+_OFF_LOGIN_URL_RE = re.compile(r"^(?!.*login)", re.I)
+# Navigation errors a retry cannot fix (bad host/URL, or the request was cancelled)
+_FATAL_NAV_ERROR_RE = re.compile(r"ERR_NAME_NOT_RESOLVED|ERR_ABORTED|ERR_INVALID_URL")
+
+# Elements whose text content is not rendered page text
+_NON_TEXT_TAGS = frozenset({"script", "style", "template"})
+
+LOGIN_EMAIL_SELECTOR = 'input[name="email"], input[type="email"], #email, input[autocomplete="username"]'
+LOGIN_PASSWORD_SELECTOR = 'input[name="password"], input[type="password"], #password, input[autocomplete="current-password"]'
+LOGIN_SUBMIT_SELECTOR = 'button[type="submit"], button:has-text("Sign In"), button:has-text("Log In"), button:has-text("Sign in")'
+LOGIN_FIELD_WAIT_MS = 6000
+
+# Elements each scraper actually needs; waiting on them replaces networkidle
+RECENT_SALE_SELECTOR = 'text=/Most\\s+Recent\\s+Sale|Last\\s+Sold/i'
+HISTORY_BUTTON_SELECTOR = ".latest-sales__header__history"
+LISTINGS_CONTAINER_SELECTOR = ".product-details__listings"
+_INNER_HTML_JS = "(selector) => { const el = document.querySelector(selector); return el ? el.innerHTML : null; }"
+# The container renders before its rows arrive over XHR, so readiness is the first priced row
+LISTINGS_READY_SELECTOR = ".product-details__listings .listing-item__listing-data__info__price"
+# The section's own button first; the broad text matches can hit hidden or unrelated buttons
+HISTORY_TRIGGER_SELECTORS = (
+    '.latest-sales__header__history button, .latest-sales__header__history',
+    'button:has-text("Sales History"), button[aria-label*="History"], button:has-text("History")',
+)
+# Tiers, not one union: page-wide "Show More"/"Load More" buttons (description, reviews)
+# can precede the pager in DOM order, so they are only tried when there is no pager
+NEXT_PAGE_SELECTORS = (
+    '.tcg-pagination.search-pagination a[aria-label*="Next"]:not([aria-disabled="true"]), '
+    '.tcg-pagination.search-pagination button[aria-label*="Next"]:not([disabled]), '
+    '.tcg-pagination.search-pagination a:has-text("Next"), '
+    '.tcg-pagination.search-pagination button:has-text("Next"), '
+    '.tcg-pagination.search-pagination li.next a:not(.disabled)',
+    'button:has-text("Load More"), [data-testid*="load-more"], button:has-text("Show More")',
+)
+# Tried in this order: a union matches in DOM order, so a visible outer wrapper or backdrop
+# carrying a *modal* class would otherwise win over the real [role="dialog"] inside it
+DIALOG_SELECTORS = (
+    '[role="dialog"], [aria-modal="true"]',
+    '.modal, .MuiDialog-paper, .chakra-modal__content, [class*="dialog"], [class*="modal"]',
+)
+ACCOUNT_MENU_SELECTOR = (
+    '[aria-label*="Account"], [data-testid*="account"], [aria-label*="Profile"], a[href*="/myaccount"], '
+    'button[aria-label*="Account"], .header__account, .AccountMenu, .user-menu'
+)
+# XHRs behind the snapshot dialog (mpapi latestsales, infinite-api price history)
+SALES_HISTORY_URL_RE = re.compile(os.getenv("SALES_HISTORY_URL_RE") or r"/latestsales|/price/history/", re.I)
+SNAPSHOT_TITLE_SELECTOR = 'text=/Sales\\s+History\\s+Snapshot/i'
 
 # ---------- proxy ----------
 def _parse_proxy_env():
@@ -58,39 +196,79 @@ def _parse_proxy_env():
         return None
     u = urlparse(raw if "://" in raw else f"http://{raw}")
     if not u.hostname or not u.port:
-        print("[proxy] invalid proxy URL:", raw)
+        logger.warning("[proxy] invalid proxy URL: %s", raw)
         return None
     proxy = {"server": f"{u.scheme}://{u.hostname}:{u.port}"}
     if u.username:
         proxy["username"] = u.username
     if u.password:
         proxy["password"] = u.password
-    print("[proxy] using", proxy["server"], "auth=" + ("yes" if "username" in proxy else "no"))
+    logger.info("[proxy] using %s auth=%s", proxy["server"], "yes" if "username" in proxy else "no")
     return proxy
 
+# The environment does not change under a running process; parse (and log) it once
+PROXY_CONFIG = _parse_proxy_env()
+
 # ---------- helpers ----------
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+def _elapsed_ms(t0_ns: int) -> int:
+    """Milliseconds since t0_ns, a time.monotonic_ns() reading (immune to wall-clock jumps)."""
+    return (time.monotonic_ns() - t0_ns) // 1_000_000
+
+# Most recent artifact path per kind ("screenshot"/"html"), updated as they are
+# written so readers never have to list and sort DEBUG_DIR.
+_LATEST_ARTIFACTS: Dict[str, str] = {}
+
+def latest_artifact(kind: str) -> Optional[str]:
+    return _LATEST_ARTIFACTS.get(kind)
+
+# The page has to be captured on the Playwright thread, but encoding and the disk
+# writes do not; one writer thread keeps failure bursts from stalling the scrapes themselves.
+_DEBUG_WRITER = ThreadPoolExecutor(max_workers=1, thread_name_prefix="debug-writer")
+# Caps captures held in memory waiting for the writer; past it new ones are skipped
+_DEBUG_PENDING = threading.BoundedSemaphore(_env_int("DEBUG_MAX_PENDING", 64))
+
+def _write_artifact(kind: str, path: str, data: Union[str, bytes]) -> None:
+    try:
+        pathlib.Path(path).write_bytes(data.encode("utf-8") if isinstance(data, str) else data)
+        _LATEST_ARTIFACTS[kind] = path
+    except Exception as e:
+        logger.warning("[debug] could not write %s: %s", path, e)
+    finally:
+        _DEBUG_PENDING.release()
+
 def _save_debug(page: Page, tag: str) -> Dict[str, str]:
     ts  = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
     uid = uuid.uuid4().hex[:8]
     base = f"{DEBUG_DIR}/{tag}-{ts}-{uid}"
+    # Viewport JPEG by default: a full-page PNG of a product page runs to megabytes
+    if SCREENSHOT_FORMAT == "png":
+        shot_path, shot_options = f"{base}.png", {"type": "png"}
+    else:
+        shot_path, shot_options = f"{base}.jpg", {"type": "jpeg", "quality": SCREENSHOT_QUALITY}
+    captures = (
+        ("screenshot", shot_path, lambda: page.screenshot(full_page=FULL_PAGE_SCREENSHOTS, **shot_options)),
+        ("html", f"{base}.html", page.content),
+    )
     out: Dict[str, str] = {}
-    try:
-        page.screenshot(path=f"{base}.png", full_page=True)
-        out["screenshot"] = f"{base}.png"
-    except Exception:
-        pass
-    try:
-        with open(f"{base}.html", "w", encoding="utf-8") as f:
-            f.write(page.content())
-        out["html"] = f"{base}.html"
-    except Exception:
-        pass
+    for kind, path, capture in captures:
+        # A backed-up writer skips the capture too, not just the write
+        if not _DEBUG_PENDING.acquire(blocking=False):
+            logger.warning("[debug] writer backlog full, skipping %s", path)
+            continue
+        try:
+            _DEBUG_WRITER.submit(_write_artifact, kind, path, capture())
+            out[kind] = path
+        except Exception:
+            _DEBUG_PENDING.release()
     return out
 
 def _to_money_float(text: str) -> Optional[float]:
-    if not text:
+    if not text or "$" not in text:
         return None
-    m = re.search(r"\$[0-9][0-9,]*\.?[0-9]{0,2}", text)
+    m = _MONEY_RE.search(text)
     if not m:
         return None
     try:
@@ -98,98 +276,381 @@ def _to_money_float(text: str) -> Optional[float]:
     except Exception:
         return None
 
-def _extract_recent_sale_from_html(html: str) -> Optional[float]:
-    soup = BeautifulSoup(html, "lxml")
-    labels = soup.find_all(string=re.compile(r"(Most\s+Recent\s+Sale|Last\s+Sold)", re.I))
-    for node in labels:
-        el = node.parent
-        for _ in range(4):
-            if not el:
-                break
-            val = _to_money_float(el.get_text(" ", strip=True))
-            if val is not None:
-                return val
-            el = el.parent
-    return _to_money_float(soup.get_text(" ", strip=True))
+# First money amount in up to 4 ancestors of each sale label, else in the body text.
+# Only that amount (e.g. "$12.34") crosses the wire, not the serialized document or
+# the texts searched.
+_RECENT_SALE_JS = """(moneyPattern) => {
+    const label = /Most\\s+Recent\\s+Sale|Last\\s+Sold/i;
+    const money = new RegExp(moneyPattern);
+    const walker = document.createTreeWalker(document.body, NodeFilter.SHOW_TEXT);
+    for (let n = walker.nextNode(); n; n = walker.nextNode()) {
+        const parent = n.parentElement;
+        if (!parent || parent.closest("script, style, template") || !label.test(n.nodeValue)) continue;
+        for (let el = parent, i = 0; el && i < 4; el = el.parentElement, i++) {
+            const m = money.exec(el.innerText || "");
+            if (m) return m[0];
+        }
+    }
+    const m = money.exec(document.body.innerText || "");
+    return m ? m[0] : null;
+}"""
+
+def _extract_recent_sale_from_page(page: Page) -> Optional[float]:
+    try:
+        amount = page.evaluate(_RECENT_SALE_JS, _MONEY_RE.pattern)
+    except Exception:
+        return _extract_recent_sale_from_text(page)
+    return _to_money_float(amount)
+
+def _extract_recent_sale_from_text(page: Page) -> Optional[float]:
+    """Fallback on the rendered text: first amount shortly after a sale label, else anywhere."""
+    try:
+        text = page.locator("main, [role=main], body").first.inner_text(timeout=3000)
+    except Exception:
+        return None
+    m = _LABEL_MONEY_RE.search(text)
+    val = _to_money_float(m.group(1)) if m else None
+    return val if val is not None else _to_money_float(text)
+
+# Finds and clicks a visible accept button in one round trip; most pages have no banner,
+# and probing selectors one by one costs a CDP call each.
+_CONSENT_CLICK_JS = """() => {
+    const visible = (el) => !!el.offsetParent;
+    const candidates = [...document.querySelectorAll(
+        '[data-testid="accept-all"], button[aria-label*="Accept"], [aria-label*="Accept all"]')];
+    const el = candidates.find(visible)
+        || [...document.querySelectorAll("button")].find((b) => visible(b) && /Accept All|I Accept/i.test(b.textContent));
+    if (!el) return false;
+    el.click();
+    return true;
+}"""
 
 def _click_consent_if_present(page: Page):
-    for sel in [
-        'button:has-text("Accept All")',
-        'button:has-text("I Accept")',
-        '[data-testid="accept-all"]',
-        'button[aria-label*="Accept"]',
-        '[aria-label*="Accept all"]',
-    ]:
+    # Consent is remembered by the context's cookies, so once a banner has been clicked
+    # later pages of this session skip the probe. A page without a banner proves nothing:
+    # it may be another site, or the banner may render after domcontentloaded.
+    if getattr(_SESSION, "consent_done", False):
+        return
+    try:
+        if page.evaluate(_CONSENT_CLICK_JS):
+            _SESSION.consent_done = True
+    except Exception:
+        pass
+
+def _block_unneeded_requests(route) -> None:
+    # Card images, fonts, media and third-party trackers are never parsed; aborting
+    # them keeps page loads to the HTML/JS/XHR we actually scrape.
+    route.abort()
+
+def _seed_profile_from_state(context) -> None:
+    # A fresh profile has no cookies yet; start it from the saved login instead of
+    # forcing a password login per thread.
+    try:
+        cookies = orjson.loads(pathlib.Path(STATE_PATH).read_bytes()).get("cookies") or []
+        if cookies:
+            context.add_cookies(cookies)
+    except Exception as e:
+        logger.warning("[profile] could not seed cookies from %s: %s", STATE_PATH, e)
+
+def _clear_profile_locks(profile: pathlib.Path) -> None:
+    # A container killed mid-run leaves Chromium's singleton symlinks behind and the next
+    # launch refuses the profile; only this process ever opens it, so they are stale.
+    for name in ("SingletonLock", "SingletonSocket", "SingletonCookie"):
         try:
-            loc = page.locator(sel).first
-            if loc and loc.is_visible():
-                loc.click(timeout=1500)
-                break
-        except Exception:
+            os.unlink(profile / name)
+        except FileNotFoundError:
             pass
+        except OSError as e:
+            logger.warning("[profile] could not remove %s: %s", profile / name, e)
+
+# Fingerprint overrides injected into every page; built once from the NAV_* settings
+_FINGERPRINT_JS = f"""
+    Object.defineProperty(navigator, 'platform', {{ get: () => '{NAV_PLATFORM}' }});
+    Object.defineProperty(navigator, 'languages', {{ get: () => {orjson.dumps([x.strip() for x in NAV_LANGS.split(",") if x.strip()]).decode()} }});
+    Object.defineProperty(navigator, 'webdriver', {{ get: () => undefined }});
+    window.chrome = window.chrome || {{ runtime: {{}} }};
+"""
+
+_PROFILE_SLOTS_IN_USE: Set[int] = set()
+_PROFILE_SLOTS_LOCK = threading.Lock()
+
+def _claim_profile_slot() -> int:
+    with _PROFILE_SLOTS_LOCK:
+        slot = 0
+        while slot in _PROFILE_SLOTS_IN_USE:
+            slot += 1
+        _PROFILE_SLOTS_IN_USE.add(slot)
+        return slot
+
+def _release_profile_slot(slot: Optional[int]) -> None:
+    if slot is not None:
+        with _PROFILE_SLOTS_LOCK:
+            _PROFILE_SLOTS_IN_USE.discard(slot)
 
 def _new_context(p, use_saved_state: bool):
-    storage_state_path = STATE_PATH if (use_saved_state and pathlib.Path(STATE_PATH).exists()) else None
-    proxy_cfg = _parse_proxy_env()
-    browser = p.chromium.launch(headless=True, args=["--no-sandbox"])
-    context = browser.new_context(
+    """Returns (browser, context); browser is None for a persistent-profile context."""
+    options = dict(
         viewport={"width": 1366, "height": 900},
         locale="en-US",
         timezone_id="America/New_York",
         user_agent=USER_AGENT,
-        storage_state=storage_state_path,
         device_scale_factor=1.0,
         is_mobile=False,
         has_touch=False,
         java_script_enabled=True,
-        proxy=proxy_cfg,
+        proxy=PROXY_CONFIG,
     )
+    if BROWSER_PROFILE_DIR:
+        # Chromium locks a profile directory, so every live session gets its own slot;
+        # slots are handed out lowest-first, so a restart reuses the same directories
+        # whichever worker thread happens to claim them.
+        slot = _claim_profile_slot()
+        profile = pathlib.Path(BROWSER_PROFILE_DIR) / f"slot-{slot}"
+        fresh = not profile.exists()
+        if not fresh:
+            _clear_profile_locks(profile)
+        browser = None
+        try:
+            context = p.chromium.launch_persistent_context(str(profile), headless=True, args=CHROMIUM_ARGS,
+                                                           handle_sigint=False, **options)
+        except Exception:
+            _release_profile_slot(slot)
+            raise
+        _SESSION.profile_slot = slot
+        if fresh and use_saved_state and _STATE_SAVED:
+            _seed_profile_from_state(context)
+    else:
+        storage_state_path = STATE_PATH if (use_saved_state and _STATE_SAVED) else None
+        browser = p.chromium.launch(headless=True, args=CHROMIUM_ARGS, handle_sigint=False)
+        context = browser.new_context(storage_state=storage_state_path, **options)
     context.set_extra_http_headers({"Accept-Language": "en-US,en;q=0.9"})
-    # Fingerprint
-    langs_js = "[" + ",".join([f"'{x.strip()}'" for x in NAV_LANGS.split(",") if x.strip()]) + "]"
-    context.add_init_script(f"""
-        Object.defineProperty(navigator, 'platform', {{ get: () => '{NAV_PLATFORM}' }});
-        Object.defineProperty(navigator, 'languages', {{ get: () => {langs_js} }});
-        Object.defineProperty(navigator, 'webdriver', {{ get: () => undefined }});
-        window.chrome = window.chrome || {{ runtime: {{}} }};
-    """)
+    context.add_init_script(_FINGERPRINT_JS)
+    if BLOCK_ASSETS:
+        context.route(BLOCKED_URL_RE, _block_unneeded_requests)
     return browser, context
 
+# ---------- browser session reuse ----------
+# Launching Chromium and building a context costs ~1 s, so each thread keeps one warm
+# Playwright/browser/context and reuses it across calls. Sync Playwright objects are
+# bound to the thread that created them, hence thread-local instead of a global.
+class _BrowserSession(NamedTuple):
+    playwright: Any
+    browser: Optional[Any]
+    context: Any
+
+_SESSION = threading.local()
+# Every live session by owning thread, so shutdown can tell whether any are left open
+_SESSIONS: Dict[int, _BrowserSession] = {}
+_SESSIONS_LOCK = threading.Lock()
+
+def _session_alive(session: _BrowserSession) -> bool:
+    # A persistent-profile context has no Browser object; its "close" event is the only signal
+    if getattr(_SESSION, "context_closed", False):
+        return False
+    return session.browser is None or session.browser.is_connected()
+
+def _mark_context_closed(_context) -> None:
+    _SESSION.context_closed = True
+
+def _get_context():
+    session: Optional[_BrowserSession] = getattr(_SESSION, "value", None)
+    if session is not None and not _session_alive(session):
+        close_browser_session()
+        session = None
+    if session is None:
+        playwright = sync_playwright().start()
+        browser, context = _new_context(playwright, use_saved_state=True)
+        session = _BrowserSession(playwright, browser, context)
+        _SESSION.value = session
+        with _SESSIONS_LOCK:
+            _SESSIONS[threading.get_ident()] = session
+        _SESSION.login_info = None
+        _SESSION.context_closed = False
+        _SESSION.consent_done = False
+        context.on("close", _mark_context_closed)
+    return session.context
+
+def close_browser_session() -> None:
+    """Tear down the calling thread's cached Playwright session, if it has one."""
+    session: Optional[_BrowserSession] = getattr(_SESSION, "value", None)
+    _SESSION.value = None
+    _SESSION.login_info = None
+    _SESSION.page = None
+    _SESSION.consent_done = False
+    if session is None:
+        return
+    with _SESSIONS_LOCK:
+        _SESSIONS.pop(threading.get_ident(), None)
+    closers = [session.context.close, session.playwright.stop]
+    if session.browser is not None:
+        closers.insert(1, session.browser.close)
+    for close in closers:
+        try:
+            close()
+        except Exception:
+            pass
+    # Only once the context is closed has Chromium released the profile directory
+    _release_profile_slot(getattr(_SESSION, "profile_slot", None))
+    _SESSION.profile_slot = None
+
+def _close_session_then_wait(barrier: threading.Barrier, timeout: float) -> None:
+    close_browser_session()
+    try:
+        # Hold this thread until its siblings have taken their task, so each pool
+        # thread runs exactly one close instead of one idle thread taking them all
+        barrier.wait(timeout)
+    except threading.BrokenBarrierError:
+        pass
+
+def close_all_browser_sessions(pools: Sequence[Tuple[ThreadPoolExecutor, int]] = (), timeout: float = 10.0) -> None:
+    """Close the sessions of the calling thread, the batch pool and the given (pool, max_workers) pairs.
+
+    Sync Playwright objects only work on the thread that created them, so each pool
+    thread is handed a close task rather than closing its browser from here. Call this
+    before the pools are shut down; a thread still busy past timeout keeps its browser.
+    """
+    close_browser_session()
+    for pool, workers in (*pools, (_BATCH_POOL, BATCH_CONCURRENCY)):
+        with _SESSIONS_LOCK:
+            if not _SESSIONS:
+                return
+        barrier = threading.Barrier(workers)
+        wait_futures([pool.submit(_close_session_then_wait, barrier, timeout) for _ in range(workers)],
+                     timeout=timeout * 2)
+    with _SESSIONS_LOCK:
+        left = len(_SESSIONS)
+    if left:
+        logger.warning("[browser] %d session(s) still open at shutdown; their threads were busy", left)
+
+# Interpreter exit can only close the main thread's session (pool threads are already
+# gone by then); the server closes worker sessions via close_all_browser_sessions.
+atexit.register(close_browser_session)
+
+def _acquire_page(context) -> Page:
+    """The thread's parked scrape page if it is still usable, else a new one.
+
+    Navigating an existing tab to the next URL skips the renderer/frame setup a
+    fresh page costs; each thread runs one scrape at a time, so one page is enough.
+    """
+    page: Optional[Page] = getattr(_SESSION, "page", None)
+    _SESSION.page = None
+    if page is not None and not page.is_closed() and page.context is context:
+        return page
+    return context.new_page()
+
+def _release_page(page: Page) -> None:
+    """Park page for the next _acquire_page on this thread (closing any page already parked)."""
+    if page.is_closed():
+        return
+    parked: Optional[Page] = getattr(_SESSION, "page", None)
+    if parked is not None and parked is not page:
+        try:
+            parked.close()
+        except Exception:
+            pass
+    _SESSION.page = page
+
+# Tested in the page so only a boolean crosses the wire, not the whole body text
+_ANTIBOT_JS = """([titlePattern, bodyPattern]) =>
+    new RegExp(titlePattern, "i").test(document.title || "")
+    || new RegExp(bodyPattern, "i").test(document.body ? document.body.textContent : "")"""
+
 def _anti_bot_check(page: Page) -> Optional[str]:
-    title = (page.title() or "")
-    body  = (page.text_content("body") or "").lower()
-    if "access denied" in title.lower() or "verify you are a human" in body or "are you human" in body:
+    if page.evaluate(_ANTIBOT_JS, [_ANTIBOT_TITLE_RE.pattern, _ANTIBOT_BODY_RE.pattern]):
         return "blocked_or_challenge"
     return None
 
-def _goto_with_retries(page: Page, url: str) -> None:
+def _wait_for_quiet(page: Page, idle_ms: int = QUIET_IDLE_MS, timeout_ms: int = QUIET_TIMEOUT_MS) -> bool:
+    """Wait until no requests have been in flight for idle_ms, giving up after timeout_ms.
+
+    Unlike networkidle this is bounded, and a page that keeps analytics or
+    long-poll connections open only costs timeout_ms instead of the full nav budget.
+    """
+    pending: Set[Any] = set()
+    on_request = pending.add
+    on_done = pending.discard
+    page.on("request", on_request)
+    page.on("requestfinished", on_done)
+    page.on("requestfailed", on_done)
+    try:
+        deadline = time.monotonic() + timeout_ms / 1000.0
+        quiet_since = time.monotonic()
+        while time.monotonic() < deadline:
+            if pending:
+                quiet_since = time.monotonic()
+            elif (time.monotonic() - quiet_since) * 1000 >= idle_ms:
+                return True
+            page.wait_for_timeout(QUIET_POLL_MS)
+        return False
+    finally:
+        page.remove_listener("request", on_request)
+        page.remove_listener("requestfinished", on_done)
+        page.remove_listener("requestfailed", on_done)
+
+def _backoff_ms(attempt: int, base_ms: int = 500, cap_ms: int = 30000) -> float:
+    # Exponential with full jitter: workers retrying against the same rate limit
+    # spread out over the whole window instead of returning together
+    return random.uniform(0, min(cap_ms, base_ms * 2 ** attempt))
+
+def _goto_with_retries(page: Page, url: str, ready_selector: Optional[str] = None) -> None:
+    """Navigate with retries, then wait for ready_selector (or a short network quiet period)."""
     last_err = None
     for attempt in range(RETRY_TIMES + 1):
         try:
-            page.goto(url, wait_until="load", timeout=NAV_TIMEOUT_MS)
-            try:
-                page.wait_for_load_state("networkidle", timeout=min(15000, NAV_TIMEOUT_MS // 2))
-            except Exception:
-                pass
+            # With a ready selector the element wait is the real readiness signal, so
+            # don't also wait for every subresource to finish loading
+            page.goto(url, wait_until="domcontentloaded" if ready_selector else "load", timeout=NAV_TIMEOUT_MS)
+            if ready_selector:
+                try:
+                    page.locator(ready_selector).first.wait_for(timeout=READY_SELECTOR_WAIT_MS)
+                    return
+                except Exception:
+                    pass
+            _wait_for_quiet(page)
             return
         except Exception as e:
             last_err = e
-            page.wait_for_timeout(500 * (attempt + 1))
+            if _FATAL_NAV_ERROR_RE.search(str(e)) or attempt == RETRY_TIMES:
+                break
+            page.wait_for_timeout(_backoff_ms(attempt))
     raise last_err if last_err else RuntimeError("navigation failed")
 
-def _slow_scroll(page: Page, steps: int = 14):
+# Scrolls down in steps inside the page, stopping as soon as `until` matches; one
+# round trip instead of two per step, and no fixed ~5 s when the target shows up early.
+_SLOW_SCROLL_JS = """async ({until, steps, delay}) => {
+    const found = () => !!(until && document.querySelector(until));
+    const total = document.body.scrollHeight;
+    for (let i = 1; i <= steps && !found(); i++) {
+        window.scrollTo(0, Math.floor(total * i / steps));
+        await new Promise((resolve) => setTimeout(resolve, delay));
+    }
+    window.scrollBy(0, -300);
+    return found();
+}"""
+
+def _slow_scroll(page: Page, steps: int = 14, until: Optional[str] = None, delay_ms: int = 350) -> bool:
     try:
-        total = page.evaluate("() => document.body.scrollHeight")
-        for i in range(steps):
-            y = int(total * (i + 1) / steps)
-            page.evaluate("(yy) => window.scrollTo(0, yy)", y)
-            page.wait_for_timeout(350)
-        page.evaluate("() => window.scrollBy(0, -300)")
-        page.wait_for_timeout(300)
+        return bool(page.evaluate(_SLOW_SCROLL_JS, {"until": until, "steps": steps, "delay": delay_ms}))
     except Exception:
-        pass
+        return False
 
 # ---------- login ----------
+# Both login signals in one round trip: the first "Sign In"/"Log In" text on the page
+# must not be visible, and some account-menu element must be.
+_LOGIN_STATE_JS = """(accountSelector) => {
+    if (!document.body) return false;
+    const visible = (el) => el.getClientRects().length > 0 && getComputedStyle(el).visibility !== "hidden";
+    const signIn = /Sign\\s*In|Log\\s*In/i;
+    const walker = document.createTreeWalker(document.body, NodeFilter.SHOW_TEXT);
+    for (let node = walker.nextNode(); node; node = walker.nextNode()) {
+        const el = node.parentElement;
+        if (!el || el.closest("script, style, noscript, template") || !signIn.test(node.data)) continue;
+        if (visible(el)) return false;
+        break;
+    }
+    return [...document.querySelectorAll(accountSelector)].some(visible);
+}"""
+
 def _is_logged_in(page: Page) -> bool:
     try:
         if "/login" in (page.url or "").lower():
@@ -197,27 +658,30 @@ def _is_logged_in(page: Page) -> bool:
     except Exception:
         pass
     try:
-        if page.locator('text=/Sign\\s*In|Log\\s*In/i').first.is_visible():
-            return False
+        return bool(page.evaluate(_LOGIN_STATE_JS, ACCOUNT_MENU_SELECTOR))
     except Exception:
-        pass
-    for sel in [
-        '[aria-label*="Account"]',
-        '[data-testid*="account"]',
-        '[aria-label*="Profile"]',
-        'a[href*="/myaccount"]',
-        'button[aria-label*="Account"]',
-        '.header__account', '.AccountMenu', '.user-menu',
-    ]:
-        try:
-            loc = page.locator(sel).first
-            if loc and loc.is_visible():
-                return True
-        except Exception:
-            pass
-    return False
+        return False
+
+def _write_atomic(path: pathlib.Path, data: bytes) -> None:
+    # Temp file + rename so a concurrent reader (or a crash mid-write) never sees half a file
+    tmp = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+def _persist_state(context) -> None:
+    """Write a just-verified context's storage state to STATE_PATH and record the verification time."""
+    data = orjson.dumps(context.storage_state())
+    path = pathlib.Path(STATE_PATH)
+    try:
+        unchanged = path.read_bytes() == data
+    except OSError:
+        unchanged = False
+    if not unchanged:
+        _write_atomic(path, data)
+    _write_atomic(pathlib.Path(STATE_VERIFIED_PATH), orjson.dumps({"verified_at": time.time()}))
 
 def _do_login_flow(context, capture=True) -> Dict[str, Any]:
+    global _STATE_SAVED
     email = os.getenv("TCG_EMAIL")
     password = os.getenv("TCG_PASSWORD")
     if not email or not password:
@@ -227,59 +691,68 @@ def _do_login_flow(context, capture=True) -> Dict[str, Any]:
     before_paths = {}
     after_paths  = {}
     try:
-        page.goto("https://www.tcgplayer.com/login?returnUrl=https://www.tcgplayer.com/", wait_until="domcontentloaded", timeout=NAV_TIMEOUT_MS)
+        _goto_with_retries(page, "https://www.tcgplayer.com/login?returnUrl=https://www.tcgplayer.com/",
+                           ready_selector=LOGIN_EMAIL_SELECTOR)
         _click_consent_if_present(page)
         if capture:
             before_paths = _save_debug(page, "login-before")
 
-        filled_email = False
-        for sel in ['input[name="email"]', 'input[type="email"]', '#email', 'input[autocomplete="username"]']:
-            try:
-                page.fill(sel, email, timeout=4000); filled_email = True; break
-            except PWTimeout:
-                pass
-
-        filled_pass = False
-        for sel in ['input[name="password"]', 'input[type="password"]', '#password', 'input[autocomplete="current-password"]']:
-            try:
-                page.fill(sel, password, timeout=4000); filled_pass = True; break
-            except PWTimeout:
-                pass
-
-        if not (filled_email and filled_pass):
-            if capture: after_paths = _save_debug(page, "login-after")
+        # One comma-union locator per field: Playwright resolves whichever candidate
+        # appears first instead of probing each selector with its own timeout.
+        try:
+            page.locator(LOGIN_EMAIL_SELECTOR).first.fill(email, timeout=LOGIN_FIELD_WAIT_MS)
+            page.locator(LOGIN_PASSWORD_SELECTOR).first.fill(password, timeout=LOGIN_FIELD_WAIT_MS)
+        except PWTimeout:
+            after_paths = _save_debug(page, "login-after")
             return {"ok": False, "error": "selectors_not_found", "before": before_paths, "after": after_paths}
 
-        clicked = False
-        for sel in ['button[type="submit"]','button:has-text("Sign In")','button:has-text("Log In")','button:has-text("Sign in")']:
-            try:
-                page.click(sel, timeout=4000); clicked = True; break
-            except PWTimeout:
-                pass
-        if not clicked:
+        try:
+            page.locator(LOGIN_SUBMIT_SELECTOR).first.click(timeout=LOGIN_FIELD_WAIT_MS)
+        except PWTimeout:
             try: page.keyboard.press("Enter")
             except Exception: pass
 
-        page.wait_for_timeout(1500)
-        success = False
-        for _ in range(12):
-            if _is_logged_in(page):
-                success = True; break
-            page.wait_for_timeout(500)
+        try:
+            page.wait_for_url(_OFF_LOGIN_URL_RE, timeout=8000)
+        except PWTimeout:
+            pass
 
-        if capture:
+        # Returns as soon as the account menu renders instead of sleeping in 500 ms steps
+        try:
+            page.locator(ACCOUNT_MENU_SELECTOR).filter(visible=True).first.wait_for(
+                state="visible", timeout=LOGIN_FIELD_WAIT_MS)
+        except PWTimeout:
+            pass
+        success = _is_logged_in(page)
+
+        if capture or not success:
             after_paths = _save_debug(page, "login-after")
 
         if success:
-            context.storage_state(path=STATE_PATH)
+            _persist_state(context)
+            _STATE_SAVED = True
             return {"ok": True, "before": before_paths, "after": after_paths}
         else:
             return {"ok": False, "error": "login_verification_failed", "before": before_paths, "after": after_paths}
     finally:
         page.close()
 
+def _has_auth_cookie(context) -> bool:
+    try:
+        cookies = context.cookies("https://www.tcgplayer.com")
+    except Exception:
+        return False
+    # expires is -1 for session cookies; otherwise require a few minutes of life left
+    min_expiry = time.time() + 300
+    return any(c.get("name") in AUTH_COOKIE_NAMES and (c.get("expires", -1) < 0 or c["expires"] > min_expiry)
+               for c in cookies)
+
 def _ensure_logged_in(context) -> Dict[str, Any]:
-    page = context.new_page()
+    # A live auth cookie answers the question without a homepage navigation
+    if _has_auth_cookie(context):
+        return {"ok": True, "used_existing_state": True, "auth_cookie": True}
+
+    page = _acquire_page(context)
     try:
         page.goto("https://www.tcgplayer.com/", wait_until="domcontentloaded", timeout=NAV_TIMEOUT_MS)
         _click_consent_if_present(page)
@@ -288,125 +761,332 @@ def _ensure_logged_in(context) -> Dict[str, Any]:
     except Exception:
         pass
     finally:
-        page.close()
+        _release_page(page)
 
     if FORCE_STATE_ONLY:
         return {"ok": True, "state_only": True, "note": "FORCE_STATE_ONLY; not attempting password login"}
 
     if os.getenv("TCG_EMAIL") and os.getenv("TCG_PASSWORD"):
-        return _do_login_flow(context, capture=True)
+        return _do_login_flow(context, capture=LOGIN_ARTIFACTS)
 
     return {"ok": False, "error": "no_valid_state_and_no_creds"}
 
+def _state_age_seconds() -> Optional[float]:
+    """Seconds since _persist_state last verified the saved state, or None if it never has."""
+    if not _STATE_SAVED:
+        return None
+    try:
+        return time.time() - float(orjson.loads(pathlib.Path(STATE_VERIFIED_PATH).read_bytes())["verified_at"])
+    except (OSError, orjson.JSONDecodeError, KeyError, TypeError, ValueError):
+        return None
+
+def _get_logged_in_context() -> Tuple[Any, Dict[str, Any]]:
+    """The calling thread's cached context plus its login result, checking login only once per session."""
+    context = _get_context()
+    login_info: Optional[Dict[str, Any]] = getattr(_SESSION, "login_info", None)
+    if login_info is None:
+        # A recently verified state is trusted; the scrapers' own not-logged-in check
+        # re-logs in lazily if the site disagrees.
+        age_s = _state_age_seconds()
+        if age_s is not None and age_s < STATE_FRESH_HOURS * 3600:
+            login_info = {"ok": True, "used_existing_state": True, "state_age_s": int(age_s)}
+        else:
+            login_info = _ensure_logged_in(context)
+        # Failures are not cached so the next call retries the login
+        if login_info.get("ok"):
+            _SESSION.login_info = login_info
+    return context, login_info
+
 # ---------- debug: login state-only ----------
 def debug_login_only() -> Dict[str, Any]:
-    t0 = time.time()
-    with sync_playwright() as p:
-        browser, context = _new_context(p, use_saved_state=True)
-        try:
-            page = context.new_page()
+    t0 = time.monotonic_ns()
+    context = _get_context()
+    page = context.new_page()
+    try:
+        page.goto("https://www.tcgplayer.com/", wait_until="domcontentloaded", timeout=NAV_TIMEOUT_MS)
+        _click_consent_if_present(page)
+        before = _save_debug(page, "login-state-check-before")
+
+        if _is_logged_in(page):
+            after = _save_debug(page, "login-state-check-after")
+            return {"ok": True, "mode": "state_only_check", "before": before, "after": after,
+                    "elapsed_ms": _elapsed_ms(t0), "state_path": STATE_PATH}
+
+        if FORCE_STATE_ONLY:
+            after = _save_debug(page, "login-state-check-after")
+            return {"ok": False, "mode": "state_only_check", "error": "not_logged_in_with_state",
+                    "before": before, "after": after, "elapsed_ms": _elapsed_ms(t0)}
+    finally:
+        page.close()
+
+    if not FORCE_STATE_ONLY and os.getenv("TCG_EMAIL") and os.getenv("TCG_PASSWORD"):
+        result = _do_login_flow(context, capture=True)
+        result.update({"elapsed_ms": _elapsed_ms(t0)})
+        return result
+
+    return {"ok": False, "mode": "no_state_no_creds", "error": "no_valid_state_and_no_creds",
+            "elapsed_ms": _elapsed_ms(t0)}
+
+# ---------- origin circuit breaker ----------
+class _CircuitBreaker:
+    """Opens after `threshold` consecutive failures; after reset_seconds lets one probe through."""
+
+    def __init__(self, threshold: int, reset_seconds: float):
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> Optional[bool]:
+        """None to reject the call, else whether it is the single half-open probe."""
+        with self._lock:
+            if self.threshold <= 0 or self._opened_at is None:
+                return False
+            if self._probing or time.monotonic() - self._opened_at < self.reset_seconds:
+                return None
+            self._probing = True
+            return True
+
+    def record(self, ok: Optional[bool], probe: bool) -> None:
+        """ok=None for an outcome that says nothing about the origin; it only ends a probe."""
+        with self._lock:
+            # Calls already in flight when the circuit opened report here too; only
+            # the probe itself may end the probe, or a second one would slip through
+            if probe:
+                self._probing = False
+            if ok is None:
+                return
+            if ok:
+                self._failures = 0
+                self._opened_at = None
+                return
+            self._failures += 1
+            if self.threshold > 0 and self._failures >= self.threshold:
+                # Re-arms the cooldown when a half-open probe fails
+                self._opened_at = time.monotonic()
+
+_ORIGIN_BREAKER = _CircuitBreaker(BREAKER_FAILURES, BREAKER_RESET_SECONDS)
+# Errors that say the site itself is unreachable or challenging us; a missing dialog on
+# one card says nothing about the origin and must not trip the breaker.
+_ORIGIN_FAILURE_ERRORS = frozenset({"timeout_nav", "blocked_or_challenge"})
+
+def _is_origin_url(url: str) -> bool:
+    host = (urlparse(url).hostname or "").lower()
+    return host == "tcgplayer.com" or host.endswith(".tcgplayer.com")
+
+def _origin_outcome(result: dict) -> Optional[bool]:
+    if result.get("error") not in _ORIGIN_FAILURE_ERRORS:
+        return True
+    # DNS failures and bad URLs are the caller's, not the origin's
+    if _FATAL_NAV_ERROR_RE.search(str(result.get("reason") or "")):
+        return None
+    return False
+
+def _origin_guarded(blank_fields: Callable[..., Dict[str, Any]]) -> Callable[[Callable[..., dict]], Callable[..., dict]]:
+    """Fail fast with error "circuit_open" while TCGplayer keeps failing, instead of paying for a page load.
+
+    blank_fields(*args, **kwargs) gives the scraper's empty payload keys, so the fast
+    failure has the same shape as the scraper's own error results.
+    """
+    def decorate(scrape_on_context: Callable[..., dict]) -> Callable[..., dict]:
+        @functools.wraps(scrape_on_context)
+        def guarded(context, login_info: Dict[str, Any], url: str, *args: Any, **kwargs: Any) -> dict:
+            # The API accepts any URL; other hosts must neither trip nor be blocked by
+            # TCGplayer's circuit, or a few bogus URLs would lock out every caller
+            if not _is_origin_url(url):
+                return scrape_on_context(context, login_info, url, *args, **kwargs)
+            probe = _ORIGIN_BREAKER.allow()
+            if probe is None:
+                return {"url": url, **blank_fields(*args, **kwargs), "error": "circuit_open",
+                        "reason": f"{BREAKER_FAILURES} consecutive origin failures; retrying after {BREAKER_RESET_SECONDS}s",
+                        "login": login_info, "artifacts": {}, "timestamp": _now_iso(), "elapsed_ms": 0}
+            ok: Optional[bool] = False
             try:
-                page.goto("https://www.tcgplayer.com/", wait_until="domcontentloaded", timeout=NAV_TIMEOUT_MS)
-                _click_consent_if_present(page)
-                before = _save_debug(page, "login-state-check-before")
-
-                if _is_logged_in(page):
-                    after = _save_debug(page, "login-state-check-after")
-                    return {"ok": True, "mode": "state_only_check", "before": before, "after": after,
-                            "elapsed_ms": int((time.time() - t0) * 1000), "state_path": STATE_PATH}
-
-                if FORCE_STATE_ONLY:
-                    after = _save_debug(page, "login-state-check-after")
-                    return {"ok": False, "mode": "state_only_check", "error": "not_logged_in_with_state",
-                            "before": before, "after": after, "elapsed_ms": int((time.time() - t0) * 1000)}
+                result = scrape_on_context(context, login_info, url, *args, **kwargs)
+                ok = _origin_outcome(result)
+                return result
             finally:
-                page.close()
+                _ORIGIN_BREAKER.record(ok, probe)
+        return guarded
+    return decorate
 
-            if not FORCE_STATE_ONLY and os.getenv("TCG_EMAIL") and os.getenv("TCG_PASSWORD"):
-                result = _do_login_flow(context, capture=True)
-                result.update({"elapsed_ms": int((time.time() - t0) * 1000)})
-                return result
+def _blank_last_sold() -> Dict[str, Any]:
+    return {"most_recent_sale": None}
 
-            return {"ok": False, "mode": "no_state_no_creds", "error": "no_valid_state_and_no_creds",
-                    "elapsed_ms": int((time.time() - t0) * 1000)}
-        finally:
-            context.close(); browser.close()
+def _blank_snapshot(include_last_sold: bool = False) -> Dict[str, Any]:
+    return {**(_blank_last_sold() if include_last_sold else {}),
+            "title": None, "tables": [], "stats": [], "text": None}
 
 # ---------- scrapers ----------
-def fetch_last_sold_once(url: str) -> dict:
-    t0 = time.time()
-    with sync_playwright() as p:
-        browser, context = _new_context(p, use_saved_state=True)
-        login_info = _ensure_logged_in(context)
-        page = context.new_page()
-        try:
-            try:
-                _goto_with_retries(page, url); _click_consent_if_present(page)
-            except Exception as e:
-                art = _save_debug(page, "nav-failed")
-                return {"url": url, "most_recent_sale": None, "error": "timeout_nav", "reason": str(e),
-                        "login": login_info, "artifacts": art, "timestamp": datetime.now(timezone.utc).isoformat(),
-                        "elapsed_ms": int((time.time() - t0) * 1000)}
-            if not _is_logged_in(page) and not FORCE_STATE_ONLY and os.getenv("TCG_EMAIL") and os.getenv("TCG_PASSWORD"):
-                li2 = _do_login_flow(context, capture=True)
-                login_info = {"first": login_info, "retry": li2}
-                page = context.new_page(); _goto_with_retries(page, url); _click_consent_if_present(page)
-            err = _anti_bot_check(page)
-            if err:
-                art = _save_debug(page, "challenge")
-                return {"url": url, "most_recent_sale": None, "error": err, "login": login_info, "artifacts": art,
-                        "timestamp": datetime.now(timezone.utc).isoformat(), "elapsed_ms": int((time.time() - t0) * 1000)}
-            html = page.content()
-            price = _extract_recent_sale_from_html(html)
+def _try_http_recent_sale(context, url: str) -> Optional[float]:
+    """Labelled sale amount from the raw HTML fetched with the context's cookies, or None."""
+    try:
+        resp = context.request.get(url, timeout=NAV_TIMEOUT_MS, fail_on_status_code=False)
+        if not resp.ok:
+            return None
+        root = _parse_html(resp.text())
+    except Exception:
+        return None
+    if root is None:
+        return None
+    # Only a labelled amount counts; any other price in the markup could be a listing
+    m = _LABEL_MONEY_RE.search(_node_text(root, "\n"))
+    return _to_money_float(m.group(1)) if m else None
+
+@_origin_guarded(_blank_last_sold)
+def _fetch_last_sold_on_context(context, login_info: Dict[str, Any], url: str) -> dict:
+    """Scrape the most recent sale for one URL on an already logged-in context."""
+    t0 = time.monotonic_ns()
+    if LAST_SOLD_HTTP_FIRST:
+        price = _try_http_recent_sale(context, url)
+        if price is not None:
             return {"url": url, "most_recent_sale": price, "login": login_info,
-                    "timestamp": datetime.now(timezone.utc).isoformat(), "elapsed_ms": int((time.time() - t0) * 1000)}
-        finally:
-            context.close(); browser.close()
+                    "timestamp": _now_iso(), "elapsed_ms": _elapsed_ms(t0)}
+    page = _acquire_page(context)
+    try:
+        try:
+            _goto_with_retries(page, url, ready_selector=RECENT_SALE_SELECTOR); _click_consent_if_present(page)
+        except Exception as e:
+            art = _save_debug(page, "nav-failed")
+            return {"url": url, "most_recent_sale": None, "error": "timeout_nav", "reason": str(e),
+                    "login": login_info, "artifacts": art, "timestamp": _now_iso(),
+                    "elapsed_ms": _elapsed_ms(t0)}
+        if not _is_logged_in(page) and not FORCE_STATE_ONLY and os.getenv("TCG_EMAIL") and os.getenv("TCG_PASSWORD"):
+            li2 = _do_login_flow(context, capture=LOGIN_ARTIFACTS)
+            login_info = {"first": login_info, "retry": li2}
+            _goto_with_retries(page, url, ready_selector=RECENT_SALE_SELECTOR); _click_consent_if_present(page)
+        err = _anti_bot_check(page)
+        if err:
+            art = _save_debug(page, "challenge")
+            return {"url": url, "most_recent_sale": None, "error": err, "login": login_info, "artifacts": art,
+                    "timestamp": _now_iso(), "elapsed_ms": _elapsed_ms(t0)}
+        price = _extract_recent_sale_from_page(page)
+        return {"url": url, "most_recent_sale": price, "login": login_info,
+                "timestamp": _now_iso(), "elapsed_ms": _elapsed_ms(t0)}
+    finally:
+        _release_page(page)
+
+def fetch_last_sold_once(url: str) -> dict:
+    context, login_info = _get_logged_in_context()
+    return _fetch_last_sold_on_context(context, login_info, url)
+
+# Compiled once; each returns matches in document order
+_XP_FIRST_THEAD = lxml.etree.XPath("(.//thead)[1]")
+_XP_FIRST_TR = lxml.etree.XPath("(.//tr)[1]")
+_XP_TBODIES = lxml.etree.XPath(".//tbody")
+_XP_ROWS = lxml.etree.XPath(".//tr")
+_XP_CELLS = lxml.etree.XPath(".//th|.//td")
+
+def _parse_html(html: str) -> Optional[lxml.html.HtmlElement]:
+    if not html or not html.strip():
+        return None
+    root = lxml.html.document_fromstring(html)
+    # Prune non-text nodes once per tree so every _node_text call is a plain itertext() walk;
+    # stripping comments (not deleting them) keeps React's "$<!-- -->12" fragments joined like innerText
+    lxml.etree.strip_elements(root, *_NON_TEXT_TAGS, with_tail=False)
+    lxml.etree.strip_tags(root, lxml.etree.Comment, lxml.etree.ProcessingInstruction)
+    return root
+
+def _node_text(el: lxml.html.HtmlElement, sep: str = " ") -> str:
+    """Stripped, non-empty text nodes of el joined by sep (el must come from _parse_html)."""
+    return sep.join(t for t in (s.strip() for s in el.itertext()) if t)
+
+def _shape_table(headers: List[str], cell_rows: List[List[str]]) -> Dict[str, Any]:
+    # Row keys are the same for every row of a table, so build them once and zip
+    keys = [h or f"col_{i}" for i, h in enumerate(headers)]
+    rows: List[Dict[str, Any]] = []
+    for cells in cell_rows:
+        if headers and cells == headers:
+            continue
+        if headers and len(headers) == len(cells):
+            rows.append(dict(zip(keys, cells)))
+        else:
+            rows.append({"cols": cells})
+    return {"headers": headers, "rows": rows}
+
+def _shape_key_values(pairs: List[List[str]]) -> List[Dict[str, str]]:
+    out: List[Dict[str, str]] = []
+    seen: Set[Tuple[str, str]] = set()
+    for label, value in pairs:
+        label = (label or "").strip()
+        value = (value or "").strip()
+        if (label or value) and (label, value) not in seen:
+            seen.add((label, value))
+            out.append({"label": label, "value": value})
+    return out
 
-def _extract_tables_from_dialog_html(html: str) -> List[Dict[str, Any]]:
-    soup = BeautifulSoup(html, "lxml")
+def _text_key_values(text: str) -> List[Dict[str, str]]:
+    """Pairs from "label: value" lines of free text; the fallback when the dialog has no dl pairs."""
+    out: List[Dict[str, str]] = []
+    seen: Set[Tuple[str, str]] = set()
+    for pair in _KV_LINE_RE.findall(text):
+        if pair not in seen:
+            seen.add(pair)
+            out.append({"label": pair[0], "value": pair[1]})
+    return out
+
+def _extract_tables_from_dialog(root: Optional[lxml.html.HtmlElement]) -> List[Dict[str, Any]]:
     out: List[Dict[str, Any]] = []
-    for t in soup.find_all("table"):
+    if root is None:
+        return out
+    for t in root.iter("table"):
         headers: List[str] = []
-        thead = t.find("thead")
+        thead = _XP_FIRST_THEAD(t)
         if thead:
-            headers = [th.get_text(" ", strip=True) for th in thead.find_all(["th", "td"]) if th.get_text(strip=True)]
+            headers = [text for text in (_node_text(c) for c in _XP_CELLS(thead[0])) if text]
         else:
-            first = t.find("tr")
+            first = _XP_FIRST_TR(t)
             if first:
-                headers = [c.get_text(" ", strip=True) for c in first.find_all(["th", "td"])]
-        rows: List[Dict[str, Any]] = []
-        bodies = t.find_all("tbody") or [t]
-        for body in bodies:
-            for tr in body.find_all("tr"):
-                cells = [c.get_text(" ", strip=True) for c in tr.find_all(["td", "th"])]
-                if headers and cells == headers:
-                    continue
-                if headers and len(headers) == len(cells):
-                    rows.append({headers[i] or f"col_{i}": cells[i] for i in range(len(cells))})
-                else:
-                    rows.append({"cols": cells})
-        out.append({"headers": headers, "rows": rows})
+                headers = [_node_text(c) for c in _XP_CELLS(first[0])]
+        bodies = _XP_TBODIES(t) or [t]
+        cell_rows = [[_node_text(c) for c in _XP_CELLS(tr)] for body in bodies for tr in _XP_ROWS(body)]
+        out.append(_shape_table(headers, cell_rows))
     return out
 
-def _extract_key_values_from_dialog_html(html: str) -> List[Dict[str, str]]:
-    soup = BeautifulSoup(html, "lxml")
-    out: List[Dict[str, str]] = []
-    for dl in soup.find_all("dl"):
-        dts = [dt.get_text(" ", strip=True) for dt in dl.find_all("dt")]
-        dds = [dd.get_text(" ", strip=True) for dd in dl.find_all("dd")]
-        for i in range(min(len(dts), len(dds))):
-            label = (dts[i] or "").strip()
-            value = (dds[i] or "").strip()
-            if label or value:
-                out.append({"label": label, "value": value})
-    text = soup.get_text("\n", strip=True)
-    for line in text.splitlines():
-        if ":" in line:
-            label, value = line.split(":", 1)
-            if label.strip() and value.strip():
-                out.append({"label": label.strip(), "value": value.strip()})
-    return out
+def _extract_key_values_from_dialog(root: Optional[lxml.html.HtmlElement], text: str) -> List[Dict[str, str]]:
+    """dl pairs of the parsed dialog, else "label: value" lines of its rendered text."""
+    pairs: List[List[str]] = []
+    for dl in (root.iter("dl") if root is not None else ()):
+        dts = [_node_text(dt) for dt in dl.iter("dt")]
+        dds = [_node_text(dd) for dd in dl.iter("dd")]
+        pairs.extend(zip(dts, dds))
+    return _shape_key_values(pairs) or _text_key_values(text)
+
+# Same extraction as the _extract_*_from_dialog helpers, run in the page so the dialog
+# is read once instead of serialized to HTML and re-parsed in Python.
+_DIALOG_EXTRACT_JS = """(root) => {
+    const txt = (n) => (n.innerText || "").trim();
+    const tables = [...root.querySelectorAll("table")].map((t) => {
+        const thead = t.querySelector("thead");
+        const first = t.querySelector("tr");
+        const headers = thead ? [...thead.querySelectorAll("th, td")].map(txt).filter(Boolean)
+                              : (first ? [...first.querySelectorAll("th, td")].map(txt) : []);
+        const bodies = [...t.querySelectorAll("tbody")];
+        const trs = bodies.length ? bodies.flatMap((b) => [...b.querySelectorAll("tr")]) : [...t.querySelectorAll("tr")];
+        return {headers, rows: trs.map((tr) => [...tr.querySelectorAll("td, th")].map(txt))};
+    });
+    const pairs = [...root.querySelectorAll("dl")].flatMap((dl) => {
+        const dts = [...dl.querySelectorAll("dt")].map(txt);
+        const dds = [...dl.querySelectorAll("dd")].map(txt);
+        return dts.slice(0, dds.length).map((label, i) => [label, dds[i]]);
+    });
+    return {tables, pairs, text: root.innerText || ""};
+}"""
+
+def _extract_dialog(dialog) -> Tuple[List[Dict[str, Any]], List[Dict[str, str]], str]:
+    """Tables, key/values and text of the snapshot dialog, falling back to HTML parsing."""
+    try:
+        payload = dialog.evaluate(_DIALOG_EXTRACT_JS)
+        text = payload["text"]
+        tables = [_shape_table(t["headers"], t["rows"]) for t in payload["tables"]]
+        return tables, _shape_key_values(payload["pairs"]) or _text_key_values(text), text
+    except Exception:
+        # Markup and rendered text in one round trip; parse once and share the tree
+        html, text = dialog.evaluate("(el) => [el.innerHTML, el.innerText]")
+        root = _parse_html(html)
+        return _extract_tables_from_dialog(root), _extract_key_values_from_dialog(root, text), text
 
 def _parse_shipping_text(text: Optional[str]) -> Optional[float]:
     if not text:
@@ -423,7 +1103,7 @@ def _parse_quantity_text(text: Optional[str]) -> Optional[int]:
     if not text:
         return None
     try:
-        match = re.search(r"\d+", text.replace(",", ""))
+        match = _DIGITS_RE.search(text.replace(",", ""))
         if not match:
             return None
         return int(match.group(0))
@@ -436,7 +1116,7 @@ def _extract_seller_id_from_href(href: Optional[str]) -> Optional[str]:
         return None
     try:
         # Match the text after the last "/"
-        match = re.search(r"/([^/]+)$", href.strip())
+        match = _LAST_PATH_SEGMENT_RE.search(href.strip())
         if match:
             return match.group(1)
         return None
@@ -730,7 +1410,7 @@ def _detect_current_page(page: Page) -> Optional[int]:
             """
         )
         if label:
-            match = re.search(r"\d+", label)
+            match = _DIGITS_RE.search(label)
             if match:
                 return int(match.group(0))
     except Exception:
@@ -766,9 +1446,7 @@ def _go_to_page_via_direct_url(page: Page, base_url: str, desired_page: int) ->
     except Exception:
         prev_label = None
     try:
-        prev_html = page.evaluate(
-            "() => { const el = document.querySelector('.product-details__listings'); return el ? el.innerHTML : null; }"
-        )
+        prev_html = page.evaluate(_INNER_HTML_JS, LISTINGS_CONTAINER_SELECTOR)
     except Exception:
         prev_html = None
 
@@ -874,7 +1552,7 @@ def _extract_last_page_number(page: Page) -> int:
             """
         )
         if label:
-            match = re.search(r"\d+", label)
+            match = _DIGITS_RE.search(label)
             if match:
                 value = int(match.group(0))
                 return value if value > 0 else 1
@@ -883,34 +1561,25 @@ def _extract_last_page_number(page: Page) -> int:
     return 1
 
 def _go_to_next_listings_page(page: Page) -> bool:
-    selectors = [
-        '.tcg-pagination.search-pagination a[aria-label*="Next"]:not([aria-disabled="true"])',
-        '.tcg-pagination.search-pagination button[aria-label*="Next"]:not([disabled])',
-        '.tcg-pagination.search-pagination a:has-text("Next")',
-        '.tcg-pagination.search-pagination button:has-text("Next")',
-        '.tcg-pagination.search-pagination li.next a:not(.disabled)',
-        'button:has-text("Load More")',
-        '[data-testid*="load-more"]',
-        'button:has-text("Show More")'
-    ]
+    # One query per tier for every visible candidate instead of an is_visible probe per
+    # selector; on the last page that probe loop cost a round trip for each of them.
+    candidates = []
+    for selector in NEXT_PAGE_SELECTORS:
+        try:
+            candidates = page.locator(selector).filter(visible=True).all()
+        except Exception:
+            candidates = []
+        if candidates:
+            break
+    if not candidates:
+        return False
+
     try:
-        prev_html = page.evaluate(
-            "() => { const el = document.querySelector('.product-details__listings'); return el ? el.innerHTML : null; }"
-        )
+        prev_html = page.evaluate(_INNER_HTML_JS, LISTINGS_CONTAINER_SELECTOR)
     except Exception:
         prev_html = None
 
-    for sel in selectors:
-        try:
-            loc = page.locator(sel).first
-        except Exception:
-            continue
-        try:
-            if not loc or not loc.is_visible():
-                continue
-        except Exception:
-            continue
-
+    for loc in candidates:
         disabled_attr = ""
         class_attr = ""
         try:
@@ -951,538 +1620,577 @@ def _go_to_next_listings_page(page: Page) -> bool:
                 pass
 
         if not waited:
-            try:
-                page.wait_for_load_state("networkidle", timeout=min(15000, NAV_TIMEOUT_MS))
-            except Exception:
-                pass
-            page.wait_for_timeout(800)
+            # Bounded quiet period; networkidle never settles while trackers keep polling
+            _wait_for_quiet(page)
         return True
 
     return False
 
 def _open_snapshot_dialog(page: Page, wait_ms: int) -> None:
-    _slow_scroll(page, steps=14)
+    # The latest-sales section renders lazily; the stepped scroll is only needed when
+    # the History button is not in the DOM yet. click() scrolls it into view itself.
+    if page.locator(HISTORY_BUTTON_SELECTOR).count() == 0:
+        _slow_scroll(page, steps=14, until=HISTORY_BUTTON_SELECTOR)
+
+    # First tier with a visible match wins; if none is visible yet, wait on the specific one
+    triggers = [page.locator(sel).filter(visible=True) for sel in HISTORY_TRIGGER_SELECTORS]
     try:
-        page.locator(".latest-sales__header__history").first.scroll_into_view_if_needed(timeout=1500)
+        trigger = next((t for t in triggers if t.count()), triggers[0])
+        trigger.first.click(timeout=5000)
     except Exception:
         pass
 
-    selectors = [
-        ".latest-sales__header__history button",
-        ".latest-sales__header__history",
-        'button:has-text("History")',
-        'button[aria-label*="History"]',
-        'button:has-text("Sales History")',
-        '[data-testid*="history"]',
-        'xpath=//button[.//text()[contains(., "History")]]'
-    ]
-    clicked = False
-    for sel in selectors:
-        try:
-            loc = page.locator(sel).first
-            if loc and loc.is_visible():
-                try: loc.hover(timeout=800)
-                except Exception: pass
-                loc.click(timeout=2000)
-                clicked = True
-                break
-        except Exception:
-            pass
+    try:
+        page.get_by_role("dialog", name=_SNAPSHOT_RE).or_(page.locator(SNAPSHOT_TITLE_SELECTOR)).first.wait_for(
+            state="visible", timeout=wait_ms)
+    except PWTimeout:
+        raise TimeoutError("Sales History Snapshot dialog not found")
 
-    if not clicked:
+def _read_json_responses(responses: List[Any]) -> List[Dict[str, Any]]:
+    out: List[Dict[str, Any]] = []
+    for response in responses:
         try:
-            ok = page.evaluate("(sel)=>{const el=document.querySelector(sel); if(el){ el.click(); return true } return false }",
-                               ".latest-sales__header__history")
-            if ok: clicked = True
+            if response.ok:
+                out.append({"url": response.url, "data": response.json()})
         except Exception:
             pass
+    return out
 
-    if not clicked:
+@_origin_guarded(_blank_snapshot)
+def _fetch_snapshot_on_context(context, login_info: Dict[str, Any], url: str, include_last_sold: bool = False) -> dict:
+    """Scrape the Sales History Snapshot dialog for one URL on an already logged-in context.
+
+    With include_last_sold the most recent sale is read from the same page load too.
+    """
+    t0 = time.monotonic_ns()
+    sale: Dict[str, Any] = {"most_recent_sale": None} if include_last_sold else {}
+    # The sales data is loaded by JSON calls; keep those responses so callers get the
+    # structured rows as well as what the dialog shows. Listening on the context also
+    # covers the page re-created after a re-login; each context runs one scrape at a time.
+    history_responses: List[Any] = []
+    def on_response(response) -> None:
+        if SALES_HISTORY_URL_RE.search(response.url):
+            history_responses.append(response)
+    context.on("response", on_response)
+    page = _acquire_page(context)
+    try:
         try:
-            h = page.locator(".latest-sales__header__history").first
-            if h:
-                h.focus()
-                page.keyboard.press("Enter")
-                clicked = True
-        except Exception:
-            pass
-
-    _save_debug(page, "after-click-history")
+            _goto_with_retries(page, url, ready_selector=HISTORY_BUTTON_SELECTOR); _click_consent_if_present(page)
+        except Exception as e:
+            art = _save_debug(page, "nav-failed")
+            return {"url": url, **sale, "title": None, "tables": [], "stats": [], "text": None,
+                    "error": "timeout_nav", "reason": str(e), "login": login_info, "artifacts": art,
+                    "timestamp": _now_iso(),
+                    "elapsed_ms": _elapsed_ms(t0)}
+
+        if not _is_logged_in(page) and not FORCE_STATE_ONLY and os.getenv("TCG_EMAIL") and os.getenv("TCG_PASSWORD"):
+            li2 = _do_login_flow(context, capture=LOGIN_ARTIFACTS)
+            login_info = {"first": login_info, "retry": li2}
+            _goto_with_retries(page, url, ready_selector=HISTORY_BUTTON_SELECTOR); _click_consent_if_present(page)
+
+        err = _anti_bot_check(page)
+        if err:
+            art = _save_debug(page, "challenge")
+            return {"url": url, **sale, "title": None, "tables": [], "stats": [], "text": None,
+                    "error": err, "login": login_info, "artifacts": art,
+                    "timestamp": _now_iso(),
+                    "elapsed_ms": _elapsed_ms(t0)}
+
+        if include_last_sold:
+            sale["most_recent_sale"] = _extract_recent_sale_from_page(page)
 
-    deadline = time.time() + (wait_ms / 1000.0)
-    while time.time() < deadline:
         try:
-            dlg = page.get_by_role("dialog", name=re.compile(r"Sales\\s+History\\s+Snapshot", re.I)).first
-            if dlg and dlg.is_visible():
-                return
-        except Exception:
-            pass
-        for sel in [
-            '[role="dialog"]', '[aria-modal="true"]',
-            '.modal', '.MuiDialog-paper', '.chakra-modal__content',
-            '[class*="dialog"]', '[class*="modal"]'
-        ]:
+            _open_snapshot_dialog(page, wait_ms=SNAPSHOT_WAIT_MS)
+        except Exception as e:
+            art = _save_debug(page, "dialog-failed")
+            return {"url": url, **sale, "title": None, "tables": [], "stats": [], "text": None,
+                    "error": "timeout_dialog", "reason": str(e), "login": login_info, "artifacts": art,
+                    "timestamp": _now_iso(),
+                    "elapsed_ms": _elapsed_ms(t0)}
+
+        dialog = None
+        # Prefer the dialog named "Sales History Snapshot", else any visible modal
+        candidates = [page.get_by_role("dialog", name=_SNAPSHOT_RE)] + [page.locator(sel) for sel in DIALOG_SELECTORS]
+        for loc in candidates:
             try:
-                loc = page.locator(sel).first
-                if loc and loc.is_visible():
-                    return
+                visible = loc.filter(visible=True)
+                if visible.count() > 0:
+                    dialog = visible.first; break
             except Exception:
                 pass
-        try:
-            if page.locator('text=/Sales\\s+History\\s+Snapshot/i').first.is_visible():
-                return
-        except Exception:
-            pass
-        page.wait_for_timeout(500)
 
-    raise TimeoutError("Sales History Snapshot dialog not found")
+        if not dialog:
+            art = _save_debug(page, "dialog-missing-after-open")
+            return {"url": url, **sale, "title": None, "tables": [], "stats": [], "text": None,
+                    "error": "dialog_not_found_after_open", "login": login_info, "artifacts": art,
+                    "timestamp": _now_iso(),
+                    "elapsed_ms": _elapsed_ms(t0)}
+
+        tables, stats, dialog_text = _extract_dialog(dialog)
+        title = "Sales History Snapshot"
+        history_api = _read_json_responses(history_responses)
+
+        if not tables and not stats and (not dialog_text or not dialog_text.strip()):
+            art = _save_debug(page, "dialog-empty")
+            return {"url": url, **sale, "title": title, "tables": [], "stats": [], "text": None,
+                    "history_api": history_api,
+                    "error": "dialog_empty", "login": login_info, "artifacts": art,
+                    "timestamp": _now_iso(),
+                    "elapsed_ms": _elapsed_ms(t0)}
+
+        return {"url": url, **sale, "title": title, "tables": tables, "stats": stats,
+                "text": dialog_text.strip() if dialog_text else None,
+                "history_api": history_api,
+                "login": login_info, "timestamp": _now_iso(),
+                "elapsed_ms": _elapsed_ms(t0)}
+    finally:
+        context.remove_listener("response", on_response)
+        _release_page(page)
 
 def fetch_sales_snapshot(url: str) -> dict:
-    t0 = time.time()
-    with sync_playwright() as p:
-        browser, context = _new_context(p, use_saved_state=True)
-        login_info = _ensure_logged_in(context)
-        page = context.new_page()
+    context, login_info = _get_logged_in_context()
+    return _fetch_snapshot_on_context(context, login_info, url)
+
+def fetch_sales_summary(url: str) -> dict:
+    """Most recent sale plus the Sales History Snapshot from a single navigation."""
+    context, login_info = _get_logged_in_context()
+    return _fetch_snapshot_on_context(context, login_info, url, include_last_sold=True)
+
+# ---------- batch scraping ----------
+# A batch fans out over long-lived worker threads, each driving its own cached
+# browser session (see _get_context) through a shared queue of URLs.
+_BATCH_POOL = ThreadPoolExecutor(max_workers=BATCH_CONCURRENCY, thread_name_prefix="batch-scrape")
+def _scrape_worker(scrape_on_context: Callable[..., dict], jobs: "queue.SimpleQueue[Tuple[int, str]]",
+                   results: List[dict]) -> None:
+    while True:
         try:
-            try:
-                _goto_with_retries(page, url); _click_consent_if_present(page)
-            except Exception as e:
-                art = _save_debug(page, "nav-failed")
-                return {"url": url, "title": None, "tables": [], "stats": [], "text": None,
-                        "error": "timeout_nav", "reason": str(e), "login": login_info, "artifacts": art,
-                        "timestamp": datetime.now(timezone.utc).isoformat(),
-                        "elapsed_ms": int((time.time() - t0) * 1000)}
-
-            if not _is_logged_in(page) and not FORCE_STATE_ONLY and os.getenv("TCG_EMAIL") and os.getenv("TCG_PASSWORD"):
-                li2 = _do_login_flow(context, capture=True)
-                login_info = {"first": login_info, "retry": li2}
-                page = context.new_page(); _goto_with_retries(page, url); _click_consent_if_present(page)
-
-            err = _anti_bot_check(page)
-            if err:
-                art = _save_debug(page, "challenge")
-                return {"url": url, "title": None, "tables": [], "stats": [], "text": None,
-                        "error": err, "login": login_info, "artifacts": art,
-                        "timestamp": datetime.now(timezone.utc).isoformat(),
-                        "elapsed_ms": int((time.time() - t0) * 1000)}
-
-            try:
-                _open_snapshot_dialog(page, wait_ms=SNAPSHOT_WAIT_MS)
-            except Exception as e:
-                art = _save_debug(page, "dialog-failed")
-                return {"url": url, "title": None, "tables": [], "stats": [], "text": None,
-                        "error": "timeout_dialog", "reason": str(e), "login": login_info, "artifacts": art,
-                        "timestamp": datetime.now(timezone.utc).isoformat(),
-                        "elapsed_ms": int((time.time() - t0) * 1000)}
-
-            dialog = None
-            for sel in [
-                'role=dialog[name=/Sales\\s+History\\s+Snapshot/i]',
-                '[role="dialog"]', '[aria-modal="true"]',
-                '.modal', '.MuiDialog-paper', '.chakra-modal__content',
-                '[class*="dialog"]', '[class*="modal"]'
-            ]:
-                try:
-                    loc = page.locator(sel).first if not sel.startswith('role=') else page.get_by_role("dialog", name=re.compile(r"Sales\\s+History\\s+Snapshot", re.I)).first
-                    if loc and loc.is_visible():
-                        dialog = loc; break
-                except Exception:
-                    pass
-
-            if not dialog:
-                art = _save_debug(page, "dialog-missing-after-open")
-                return {"url": url, "title": None, "tables": [], "stats": [], "text": None,
-                        "error": "dialog_not_found_after_open", "login": login_info, "artifacts": art,
-                        "timestamp": datetime.now(timezone.utc).isoformat(),
-                        "elapsed_ms": int((time.time() - t0) * 1000)}
-
-            dialog_html = dialog.inner_html()
-            dialog_text = dialog.inner_text()
-            title = "Sales History Snapshot"
-
-            tables = _extract_tables_from_dialog_html(dialog_html)
-            stats  = _extract_key_values_from_dialog_html(dialog_html)
-
-            if not tables and not stats and (not dialog_text or not dialog_text.strip()):
-                art = _save_debug(page, "dialog-empty")
-                return {"url": url, "title": title, "tables": [], "stats": [], "text": None,
-                        "error": "dialog_empty", "login": login_info, "artifacts": art,
-                        "timestamp": datetime.now(timezone.utc).isoformat(),
-                        "elapsed_ms": int((time.time() - t0) * 1000)}
-
-            return {"url": url, "title": title, "tables": tables, "stats": stats,
-                    "text": dialog_text.strip() if dialog_text else None,
-                    "login": login_info, "timestamp": datetime.now(timezone.utc).isoformat(),
-                    "elapsed_ms": int((time.time() - t0) * 1000)}
-        finally:
-            context.close(); browser.close()
+            i, url = jobs.get_nowait()
+        except queue.Empty:
+            return
+        # Small jitter so workers do not hit the origin in lockstep
+        time.sleep(random.uniform(0, BATCH_JITTER_MS / 1000.0))
+        # One URL that raises (or a session that cannot be set up) fails only its own
+        # slot; the session lookup is per URL so a broken session is rebuilt for the next.
+        try:
+            context, login_info = _get_logged_in_context()
+            results[i] = scrape_on_context(context, login_info, url)
+        except Exception as e:
+            logger.warning("[batch] scrape of %s failed: %s", url, e)
+            results[i] = {"url": url, "error": "scrape_failed", "reason": str(e),
+                          "timestamp": _now_iso()}
+
+def _scrape_batch(scrape_on_context: Callable[..., dict], urls: Sequence[str], concurrency: int) -> dict:
+    t0 = time.monotonic_ns()
+    urls = list(urls)
+    # A URL repeated in one batch is scraped once and its result shared
+    unique_urls = list(dict.fromkeys(urls))
+    unique_results: List[dict] = [{} for _ in unique_urls]
+    if unique_urls:
+        # Workers pull from a shared queue rather than fixed slices, so one slow
+        # page does not hold back the URLs that would have been queued behind it.
+        jobs: "queue.SimpleQueue[Tuple[int, str]]" = queue.SimpleQueue()
+        for job in enumerate(unique_urls):
+            jobs.put(job)
+        workers = max(1, min(concurrency, BATCH_CONCURRENCY, len(unique_urls)))
+        futures = [_BATCH_POOL.submit(_scrape_worker, scrape_on_context, jobs, unique_results) for _ in range(workers)]
+        for future in futures:
+            future.result()
+    by_url = dict(zip(unique_urls, unique_results))
+    results = [by_url[url] for url in urls]
+    return {"results": results, "timestamp": _now_iso(),
+            "elapsed_ms": _elapsed_ms(t0)}
+
+def fetch_snapshots(urls: Sequence[str], concurrency: int = BATCH_CONCURRENCY) -> dict:
+    """Scrape the Sales History Snapshot for many URLs, results in input order."""
+    return _scrape_batch(_fetch_snapshot_on_context, urls, concurrency)
+
+def fetch_last_sold_batch(urls: Sequence[str], concurrency: int = BATCH_CONCURRENCY) -> dict:
+    """Scrape the most recent sale for many URLs, results in input order."""
+    return _scrape_batch(_fetch_last_sold_on_context, urls, concurrency)
+
+def _fetch_summary_on_context(context, login_info: Dict[str, Any], url: str) -> dict:
+    return _fetch_snapshot_on_context(context, login_info, url, include_last_sold=True)
+
+def fetch_sales_summaries(urls: Sequence[str], concurrency: int = BATCH_CONCURRENCY) -> dict:
+    """Most recent sale plus snapshot for many URLs, one navigation each, results in input order."""
+    return _scrape_batch(_fetch_summary_on_context, urls, concurrency)
 
 def fetch_pages_in_product(product_id: str) -> dict:
     """Fetch the total number of pages in a product's active listings."""
-    t0 = time.time()
+    t0 = time.monotonic_ns()
     url = f"https://www.tcgplayer.com/product/{product_id}"
-    with sync_playwright() as p:
-        browser, context = _new_context(p, use_saved_state=True)
-        login_info = _ensure_logged_in(context)
-        page = context.new_page()
+    context, login_info = _get_logged_in_context()
+    page = _acquire_page(context)
+    try:
         try:
-            try:
-                _goto_with_retries(page, url); _click_consent_if_present(page)
-            except Exception as e:
-                art = _save_debug(page, "pages-nav-failed")
-                return {"product_id": str(product_id), "url": url, "total_pages": None,
-                        "error": "timeout_nav", "reason": str(e), "login": login_info, "artifacts": art,
-                        "timestamp": datetime.now(timezone.utc).isoformat(),
-                        "elapsed_ms": int((time.time() - t0) * 1000)}
-
-            if not _is_logged_in(page) and not FORCE_STATE_ONLY and os.getenv("TCG_EMAIL") and os.getenv("TCG_PASSWORD"):
-                li2 = _do_login_flow(context, capture=True)
-                login_info = {"first": login_info, "retry": li2}
-                page = context.new_page(); _goto_with_retries(page, url); _click_consent_if_present(page)
-
-            err = _anti_bot_check(page)
-            if err:
-                art = _save_debug(page, "pages-challenge")
-                return {"product_id": str(product_id), "url": url, "total_pages": None,
-                        "error": err, "login": login_info, "artifacts": art,
-                        "timestamp": datetime.now(timezone.utc).isoformat(),
-                        "elapsed_ms": int((time.time() - t0) * 1000)}
+            _goto_with_retries(page, url, ready_selector=LISTINGS_READY_SELECTOR); _click_consent_if_present(page)
+        except Exception as e:
+            art = _save_debug(page, "pages-nav-failed")
+            return {"product_id": str(product_id), "url": url, "total_pages": None,
+                    "error": "timeout_nav", "reason": str(e), "login": login_info, "artifacts": art,
+                    "timestamp": _now_iso(),
+                    "elapsed_ms": _elapsed_ms(t0)}
+
+        if not _is_logged_in(page) and not FORCE_STATE_ONLY and os.getenv("TCG_EMAIL") and os.getenv("TCG_PASSWORD"):
+            li2 = _do_login_flow(context, capture=LOGIN_ARTIFACTS)
+            login_info = {"first": login_info, "retry": li2}
+            _goto_with_retries(page, url, ready_selector=LISTINGS_READY_SELECTOR); _click_consent_if_present(page)
+
+        err = _anti_bot_check(page)
+        if err:
+            art = _save_debug(page, "pages-challenge")
+            return {"product_id": str(product_id), "url": url, "total_pages": None,
+                    "error": err, "login": login_info, "artifacts": art,
+                    "timestamp": _now_iso(),
+                    "elapsed_ms": _elapsed_ms(t0)}
 
-            try:
-                page.wait_for_selector(".product-details__listings", timeout=LISTING_PAGE_WAIT_MS)
-            except Exception as e:
-                art = _save_debug(page, "pages-container-missing")
-                return {"product_id": str(product_id), "url": page.url,
-                        "total_pages": None, "error": "listings_container_not_found", "reason": str(e),
-                        "login": login_info, "artifacts": art,
-                        "timestamp": datetime.now(timezone.utc).isoformat(),
-                        "elapsed_ms": int((time.time() - t0) * 1000)}
-
-            last_page = _extract_last_page_number(page)
-
-            return {
-                "product_id": str(product_id),
-                "url": page.url,
-                "total_pages": last_page,
-                "login": login_info,
-                "timestamp": datetime.now(timezone.utc).isoformat(),
-                "elapsed_ms": int((time.time() - t0) * 1000)
-            }
-        finally:
-            context.close(); browser.close()
+        try:
+            page.wait_for_selector(LISTINGS_CONTAINER_SELECTOR, timeout=LISTING_PAGE_WAIT_MS)
+        except Exception as e:
+            art = _save_debug(page, "pages-container-missing")
+            return {"product_id": str(product_id), "url": page.url,
+                    "total_pages": None, "error": "listings_container_not_found", "reason": str(e),
+                    "login": login_info, "artifacts": art,
+                    "timestamp": _now_iso(),
+                    "elapsed_ms": _elapsed_ms(t0)}
+
+        last_page = _extract_last_page_number(page)
+
+        return {
+            "product_id": str(product_id),
+            "url": page.url,
+            "total_pages": last_page,
+            "login": login_info,
+            "timestamp": _now_iso(),
+            "elapsed_ms": _elapsed_ms(t0)
+        }
+    finally:
+        _release_page(page)
 
-def fetch_active_listings_in_page(product_id: str, target_page: int) -> dict:
-    """Fetch active listings from a specific page number by directly navigating to the page URL."""
-    t0 = time.time()
+def _invalid_page_result(product_id: str, target_page: int, t0: int) -> dict:
+    return {"product_id": str(product_id), "target_page": target_page,
+            "listings": [], "error": "invalid_page_number", "reason": "Page number must be >= 1",
+            "timestamp": _now_iso(),
+            "elapsed_ms": _elapsed_ms(t0)}
 
-    # Validate target page
-    if target_page < 1:
-        return {"product_id": str(product_id), "target_page": target_page,
-                "listings": [], "error": "invalid_page_number", "reason": "Page number must be >= 1",
-                "timestamp": datetime.now(timezone.utc).isoformat(),
-                "elapsed_ms": int((time.time() - t0) * 1000)}
+def _scrape_listings_page(context, login_info: Dict[str, Any], product_id: str, target_page: int) -> dict:
+    """Scrape one listings page on an already logged-in context."""
+    t0 = time.monotonic_ns()
 
     # Build URL with page parameter
     url = f"https://www.tcgplayer.com/product/{product_id}?page={target_page}"
 
-    with sync_playwright() as p:
-        browser, context = _new_context(p, use_saved_state=True)
-        login_info = _ensure_logged_in(context)
-        page = context.new_page()
+    page = _acquire_page(context)
+    try:
         try:
-            try:
-                _goto_with_retries(page, url); _click_consent_if_present(page)
-            except Exception as e:
-                art = _save_debug(page, "listings-page-nav-failed")
-                return {"product_id": str(product_id), "url": url, "target_page": target_page,
-                        "listings": [], "error": "timeout_nav", "reason": str(e),
-                        "login": login_info, "artifacts": art,
-                        "timestamp": datetime.now(timezone.utc).isoformat(),
-                        "elapsed_ms": int((time.time() - t0) * 1000)}
-
-            if not _is_logged_in(page) and not FORCE_STATE_ONLY and os.getenv("TCG_EMAIL") and os.getenv("TCG_PASSWORD"):
-                li2 = _do_login_flow(context, capture=True)
-                login_info = {"first": login_info, "retry": li2}
-                page = context.new_page(); _goto_with_retries(page, url); _click_consent_if_present(page)
-
-            err = _anti_bot_check(page)
-            if err:
-                art = _save_debug(page, "listings-page-challenge")
-                return {"product_id": str(product_id), "url": url, "target_page": target_page,
-                        "listings": [], "error": err, "login": login_info, "artifacts": art,
-                        "timestamp": datetime.now(timezone.utc).isoformat(),
-                        "elapsed_ms": int((time.time() - t0) * 1000)}
+            _goto_with_retries(page, url, ready_selector=LISTINGS_READY_SELECTOR); _click_consent_if_present(page)
+        except Exception as e:
+            art = _save_debug(page, "listings-page-nav-failed")
+            return {"product_id": str(product_id), "url": url, "target_page": target_page,
+                    "listings": [], "error": "timeout_nav", "reason": str(e),
+                    "login": login_info, "artifacts": art,
+                    "timestamp": _now_iso(),
+                    "elapsed_ms": _elapsed_ms(t0)}
+
+        if not _is_logged_in(page) and not FORCE_STATE_ONLY and os.getenv("TCG_EMAIL") and os.getenv("TCG_PASSWORD"):
+            li2 = _do_login_flow(context, capture=LOGIN_ARTIFACTS)
+            login_info = {"first": login_info, "retry": li2}
+            _goto_with_retries(page, url, ready_selector=LISTINGS_READY_SELECTOR); _click_consent_if_present(page)
+
+        err = _anti_bot_check(page)
+        if err:
+            art = _save_debug(page, "listings-page-challenge")
+            return {"product_id": str(product_id), "url": url, "target_page": target_page,
+                    "listings": [], "error": err, "login": login_info, "artifacts": art,
+                    "timestamp": _now_iso(),
+                    "elapsed_ms": _elapsed_ms(t0)}
 
-            try:
-                page.wait_for_selector(".product-details__listings", timeout=LISTING_PAGE_WAIT_MS)
-            except Exception as e:
-                art = _save_debug(page, "listings-page-container-missing")
-                return {"product_id": str(product_id), "url": page.url, "target_page": target_page,
-                        "listings": [], "error": "listings_container_not_found", "reason": str(e),
-                        "login": login_info, "artifacts": art,
-                        "timestamp": datetime.now(timezone.utc).isoformat(),
-                        "elapsed_ms": int((time.time() - t0) * 1000)}
-
-            # Get the last page number to validate
-            last_page = _extract_last_page_number(page)
-
-            # Check if target page exceeds available pages
-            if target_page > last_page:
-                return {"product_id": str(product_id), "url": page.url, "target_page": target_page,
-                        "listings": [], "error": "page_out_of_range",
-                        "reason": f"Target page {target_page} exceeds last page {last_page}",
-                        "total_pages": last_page, "login": login_info,
-                        "timestamp": datetime.now(timezone.utc).isoformat(),
-                        "elapsed_ms": int((time.time() - t0) * 1000)}
-
-            # Verify we're on the correct page
-            current_page = _detect_current_page(page)
-
-            # Scrape listings from current page
-            page_listings = _scrape_active_listings_from_dom(page)
+        try:
+            page.wait_for_selector(LISTINGS_CONTAINER_SELECTOR, timeout=LISTING_PAGE_WAIT_MS)
+        except Exception as e:
+            art = _save_debug(page, "listings-page-container-missing")
+            return {"product_id": str(product_id), "url": page.url, "target_page": target_page,
+                    "listings": [], "error": "listings_container_not_found", "reason": str(e),
+                    "login": login_info, "artifacts": art,
+                    "timestamp": _now_iso(),
+                    "elapsed_ms": _elapsed_ms(t0)}
+
+        # Get the last page number to validate
+        last_page = _extract_last_page_number(page)
+
+        # Check if target page exceeds available pages
+        if target_page > last_page:
+            return {"product_id": str(product_id), "url": page.url, "target_page": target_page,
+                    "listings": [], "error": "page_out_of_range",
+                    "reason": f"Target page {target_page} exceeds last page {last_page}",
+                    "total_pages": last_page, "login": login_info,
+                    "timestamp": _now_iso(),
+                    "elapsed_ms": _elapsed_ms(t0)}
+
+        # Verify we're on the correct page
+        current_page = _detect_current_page(page)
+
+        # Scrape listings from current page
+        page_listings = _scrape_active_listings_from_dom(page)
+
+        # Remove internal _key field from listings
+        listings = []
+        for listing in page_listings:
+            listing.pop("_key", None)
+            listings.append(listing)
+
+        return {
+            "product_id": str(product_id),
+            "url": page.url,
+            "target_page": target_page,
+            "current_page": current_page,
+            "total_pages": last_page,
+            "listings": listings,
+            "listings_count": len(listings),
+            "login": login_info,
+            "timestamp": _now_iso(),
+            "elapsed_ms": _elapsed_ms(t0)
+        }
+    finally:
+        _release_page(page)
 
-            # Remove internal _key field from listings
-            listings = []
-            for listing in page_listings:
-                listing.pop("_key", None)
-                listings.append(listing)
-
-            return {
-                "product_id": str(product_id),
-                "url": page.url,
-                "target_page": target_page,
-                "current_page": current_page,
-                "total_pages": last_page,
-                "listings": listings,
-                "listings_count": len(listings),
-                "login": login_info,
-                "timestamp": datetime.now(timezone.utc).isoformat(),
-                "elapsed_ms": int((time.time() - t0) * 1000)
-            }
-        finally:
-            context.close(); browser.close()
+def fetch_active_listings_in_page(product_id: str, target_page: int) -> dict:
+    """Fetch active listings from a specific page number by directly navigating to the page URL."""
+    t0 = time.monotonic_ns()
+
+    # Validate target page
+    if target_page < 1:
+        return _invalid_page_result(product_id, target_page, t0)
+
+    context, login_info = _get_logged_in_context()
+    return _scrape_listings_page(context, login_info, product_id, target_page)
+
+def fetch_active_listings_pages(product_id: str, target_pages: Sequence[int]) -> dict:
+    """Fetch several listing pages of one product with a single context and login."""
+    t0 = time.monotonic_ns()
+    results: List[dict] = []
+    context, login_info = _get_logged_in_context()
+    for target_page in target_pages:
+        if target_page < 1:
+            results.append(_invalid_page_result(product_id, target_page, time.monotonic_ns()))
+            continue
+        results.append(_scrape_listings_page(context, login_info, product_id, target_page))
+    return {
+        "product_id": str(product_id),
+        "pages": results,
+        "login": login_info,
+        "timestamp": _now_iso(),
+        "elapsed_ms": _elapsed_ms(t0)
+    }
 
 def fetch_active_listings(product_id: str) -> dict:
-    t0 = time.time()
+    t0 = time.monotonic_ns()
     url = f"https://www.tcgplayer.com/product/{product_id}"
-    with sync_playwright() as p:
-        browser, context = _new_context(p, use_saved_state=True)
-        login_info = _ensure_logged_in(context)
-        page = context.new_page()
+    context, login_info = _get_logged_in_context()
+    page = _acquire_page(context)
+    try:
         try:
+            _goto_with_retries(page, url, ready_selector=LISTINGS_READY_SELECTOR); _click_consent_if_present(page)
+        except Exception as e:
+            art = _save_debug(page, "listings-nav-failed")
+            return {"product_id": str(product_id), "url": url, "listings": [],
+                    "error": "timeout_nav", "reason": str(e), "login": login_info, "artifacts": art,
+                    "timestamp": _now_iso(),
+                    "elapsed_ms": _elapsed_ms(t0)}
+
+        if not _is_logged_in(page) and not FORCE_STATE_ONLY and os.getenv("TCG_EMAIL") and os.getenv("TCG_PASSWORD"):
+            li2 = _do_login_flow(context, capture=LOGIN_ARTIFACTS)
+            login_info = {"first": login_info, "retry": li2}
+            _goto_with_retries(page, url, ready_selector=LISTINGS_READY_SELECTOR); _click_consent_if_present(page)
+
+        err = _anti_bot_check(page)
+        if err:
+            art = _save_debug(page, "listings-challenge")
+            return {"product_id": str(product_id), "url": url, "listings": [],
+                    "error": err, "login": login_info, "artifacts": art,
+                    "timestamp": _now_iso(),
+                    "elapsed_ms": _elapsed_ms(t0)}
+
+        try:
+            page.wait_for_selector(LISTINGS_CONTAINER_SELECTOR, timeout=LISTING_PAGE_WAIT_MS)
+        except Exception as e:
+            art = _save_debug(page, "listings-container-missing")
+            return {"product_id": str(product_id), "url": page.url,
+                    "listings": [], "error": "listings_container_not_found", "reason": str(e),
+                    "login": login_info, "artifacts": art,
+                    "timestamp": _now_iso(),
+                    "elapsed_ms": _elapsed_ms(t0)}
+
+        aggregated: List[Dict[str, Any]] = []
+        seen_listing_keys: Set[str] = set()
+        seen_signatures: Set[str] = set()
+        pages_inspected = 0
+
+        while pages_inspected < MAX_LISTING_PAGES:
+            pages_inspected += 1
             try:
-                _goto_with_retries(page, url); _click_consent_if_present(page)
-            except Exception as e:
-                art = _save_debug(page, "listings-nav-failed")
-                return {"product_id": str(product_id), "url": url, "listings": [],
-                        "error": "timeout_nav", "reason": str(e), "login": login_info, "artifacts": art,
-                        "timestamp": datetime.now(timezone.utc).isoformat(),
-                        "elapsed_ms": int((time.time() - t0) * 1000)}
-
-            if not _is_logged_in(page) and not FORCE_STATE_ONLY and os.getenv("TCG_EMAIL") and os.getenv("TCG_PASSWORD"):
-                li2 = _do_login_flow(context, capture=True)
-                login_info = {"first": login_info, "retry": li2}
-                page = context.new_page(); _goto_with_retries(page, url); _click_consent_if_present(page)
-
-            err = _anti_bot_check(page)
-            if err:
-                art = _save_debug(page, "listings-challenge")
-                return {"product_id": str(product_id), "url": url, "listings": [],
-                        "error": err, "login": login_info, "artifacts": art,
-                        "timestamp": datetime.now(timezone.utc).isoformat(),
-                        "elapsed_ms": int((time.time() - t0) * 1000)}
+                page.wait_for_selector(LISTINGS_CONTAINER_SELECTOR, timeout=LISTING_PAGE_WAIT_MS)
+            except Exception:
+                break
 
             try:
-                page.wait_for_selector(".product-details__listings", timeout=LISTING_PAGE_WAIT_MS)
-            except Exception as e:
-                art = _save_debug(page, "listings-container-missing")
-                return {"product_id": str(product_id), "url": page.url,
-                        "listings": [], "error": "listings_container_not_found", "reason": str(e),
-                        "login": login_info, "artifacts": art,
-                        "timestamp": datetime.now(timezone.utc).isoformat(),
-                        "elapsed_ms": int((time.time() - t0) * 1000)}
-
-            aggregated: List[Dict[str, Any]] = []
-            seen_listing_keys: Set[str] = set()
-            seen_signatures: Set[str] = set()
-            pages_inspected = 0
-
-            while pages_inspected < MAX_LISTING_PAGES:
-                pages_inspected += 1
-                try:
-                    page.wait_for_selector(".product-details__listings", timeout=LISTING_PAGE_WAIT_MS)
-                except Exception:
-                    break
+                signature = page.evaluate(
+                    "() => { const el = document.querySelector('.product-details__listings'); return el ? el.innerHTML.slice(0, 4096) : null; }"
+                )
+            except Exception:
+                signature = None
 
-                try:
-                    signature = page.evaluate(
-                        "() => { const el = document.querySelector('.product-details__listings'); return el ? el.innerHTML.slice(0, 4096) : null; }"
-                    )
-                except Exception:
-                    signature = None
-
-                if signature and signature in seen_signatures:
-                    break
-                if signature:
-                    seen_signatures.add(signature)
-
-                page_listings = _scrape_active_listings_from_dom(page)
-                for listing in page_listings:
-                    key = listing.pop("_key", None)
-                    dedup_key = key or f"{listing.get('sellerName','')}|{listing.get('condition','')}|{listing.get('price')}|{listing.get('quantityAvailable')}|{listing.get('additionalInfo')}"
-                    if dedup_key in seen_listing_keys:
-                        continue
-                    seen_listing_keys.add(dedup_key)
-                    aggregated.append(listing)
-
-                if not _go_to_next_listings_page(page):
-                    break
-                try:
-                    page.wait_for_timeout(600)
-                except Exception:
-                    pass
+            if signature and signature in seen_signatures:
+                break
+            if signature:
+                seen_signatures.add(signature)
 
-            return {
-                "product_id": str(product_id),
-                "url": page.url,
-                "listings": aggregated,
-                "pages_scanned": pages_inspected,
-                "login": login_info,
-                "timestamp": datetime.now(timezone.utc).isoformat(),
-                "elapsed_ms": int((time.time() - t0) * 1000)
-            }
-        finally:
-            context.close(); browser.close()
+            page_listings = _scrape_active_listings_from_dom(page)
+            for listing in page_listings:
+                key = listing.pop("_key", None)
+                dedup_key = key or f"{listing.get('sellerName','')}|{listing.get('condition','')}|{listing.get('price')}|{listing.get('quantityAvailable')}|{listing.get('additionalInfo')}"
+                if dedup_key in seen_listing_keys:
+                    continue
+                seen_listing_keys.add(dedup_key)
+                aggregated.append(listing)
+
+            if not _go_to_next_listings_page(page):
+                break
+            try:
+                page.wait_for_timeout(600)
+            except Exception:
+                pass
+
+        return {
+            "product_id": str(product_id),
+            "url": page.url,
+            "listings": aggregated,
+            "pages_scanned": pages_inspected,
+            "login": login_info,
+            "timestamp": _now_iso(),
+            "elapsed_ms": _elapsed_ms(t0)
+        }
+    finally:
+        _release_page(page)
 
 # ---------- debug helpers ----------
 def debug_proxy_ip() -> dict:
-    t0 = time.time()
-    with sync_playwright() as p:
-        browser, context = _new_context(p, use_saved_state=False)
-        page = context.new_page()
-        try:
-            page.goto("https://api.ipify.org?format=json", timeout=30000, wait_until="load")
-            return {"ok": True, "ipify": (page.text_content("body") or "").strip(),
-                    "proxy_in_use": bool(_parse_proxy_env()), "user_agent": USER_AGENT,
-                    "elapsed_ms": int((time.time() - t0) * 1000)}
-        finally:
-            context.close(); browser.close()
+    t0 = time.monotonic_ns()
+    page = _get_context().new_page()
+    try:
+        page.goto("https://api.ipify.org?format=json", timeout=30000, wait_until="load")
+        return {"ok": True, "ipify": (page.text_content("body") or "").strip(),
+                "proxy_in_use": bool(PROXY_CONFIG), "user_agent": USER_AGENT,
+                "elapsed_ms": _elapsed_ms(t0)}
+    finally:
+        page.close()
 
 def debug_cookies() -> dict:
-    t0 = time.time()
-    import json as _json
+    t0 = time.monotonic_ns()
     state_cookies = []
     try:
-        if pathlib.Path(STATE_PATH).exists():
-            state = _json.loads(open(STATE_PATH, "r", encoding="utf-8")).read()  # type: ignore
+        state = orjson.loads(pathlib.Path(STATE_PATH).read_bytes())
+        state_cookies = [{"name": c.get("name"), "domain": c.get("domain")} for c in state.get("cookies", [])]
     except Exception:
-        state = None
-    if state:
-        try:
-            state = json.loads(open(STATE_PATH, "r", encoding="utf-8").read())
-            state_cookies = [{"name": c.get("name"), "domain": c.get("domain")} for c in state.get("cookies", [])]
-        except Exception:
-            state_cookies = []
+        state_cookies = []
 
-    with sync_playwright() as p:
-        browser, context = _new_context(p, use_saved_state=True)
-        page = context.new_page()
-        try:
-            page.goto("https://www.tcgplayer.com/", wait_until="domcontentloaded", timeout=30000)
-            _click_consent_if_present(page)
-            ctx_cookies = context.cookies()
-            tcg_ctx = [{"name": c.get("name"), "domain": c.get("domain")} for c in ctx_cookies if "tcgplayer" in (c.get("domain") or "")]
-            return {"ok": True, "state_cookie_count": len(state_cookies),
-                    "state_cookie_domains": sorted({c.get("domain") for c in state_cookies if isinstance(c, dict) and c.get("domain")}),
-                    "ctx_cookie_count": len(ctx_cookies), "ctx_tcg_cookies": tcg_ctx,
-                    "logged_in_flag": _is_logged_in(page), "elapsed_ms": int((time.time() - t0) * 1000)}
-        finally:
-            context.close(); browser.close()
+    context = _get_context()
+    page = context.new_page()
+    try:
+        page.goto("https://www.tcgplayer.com/", wait_until="domcontentloaded", timeout=30000)
+        _click_consent_if_present(page)
+        ctx_cookies = context.cookies()
+        tcg_ctx = [{"name": c.get("name"), "domain": c.get("domain")} for c in ctx_cookies if "tcgplayer" in (c.get("domain") or "")]
+        return {"ok": True, "state_cookie_count": len(state_cookies),
+                "state_cookie_domains": sorted({c.get("domain") for c in state_cookies if isinstance(c, dict) and c.get("domain")}),
+                "ctx_cookie_count": len(ctx_cookies), "ctx_tcg_cookies": tcg_ctx,
+                "logged_in_flag": _is_logged_in(page), "elapsed_ms": _elapsed_ms(t0)}
+    finally:
+        page.close()
 
 def debug_localstorage() -> dict:
-    t0 = time.time()
-    with sync_playwright() as p:
-        browser, context = _new_context(p, use_saved_state=True)
-        page = context.new_page()
-        try:
-            page.goto("https://www.tcgplayer.com/", wait_until="domcontentloaded", timeout=30000)
-            keys = page.evaluate("""() => Object.keys(window.localStorage || {}).slice(0, 50)""")
-            return {"ok": True, "keys_sample": keys, "logged_in_flag": _is_logged_in(page),
-                    "elapsed_ms": int((time.time() - t0) * 1000)}
-        finally:
-            context.close(); browser.close()
+    t0 = time.monotonic_ns()
+    context = _get_context()
+    page = context.new_page()
+    try:
+        page.goto("https://www.tcgplayer.com/", wait_until="domcontentloaded", timeout=30000)
+        keys = page.evaluate("""() => Object.keys(window.localStorage || {}).slice(0, 50)""")
+        return {"ok": True, "keys_sample": keys, "logged_in_flag": _is_logged_in(page),
+                "elapsed_ms": _elapsed_ms(t0)}
+    finally:
+        page.close()
 
 def debug_visit(url: str) -> dict:
-    t0 = time.time()
-    with sync_playwright() as p:
-        browser, context = _new_context(p, use_saved_state=True)
-        page = context.new_page()
-        try:
-            _goto_with_retries(page, url)
-            _click_consent_if_present(page)
-            anti = _anti_bot_check(page)
-            arts = _save_debug(page, "debug-visit")
-            return {"ok": True, "url": page.url, "title": page.title(), "logged_in_flag": _is_logged_in(page),
-                    "anti_bot": anti, "artifacts": arts, "elapsed_ms": int((time.time() - t0) * 1000)}
-        finally:
-            context.close(); browser.close()
+    t0 = time.monotonic_ns()
+    context = _get_context()
+    page = context.new_page()
+    try:
+        _goto_with_retries(page, url)
+        _click_consent_if_present(page)
+        anti = _anti_bot_check(page)
+        arts = _save_debug(page, "debug-visit")
+        return {"ok": True, "url": page.url, "title": page.title(), "logged_in_flag": _is_logged_in(page),
+                "anti_bot": anti, "artifacts": arts, "elapsed_ms": _elapsed_ms(t0)}
+    finally:
+        page.close()
 
 def debug_trace(url: str) -> dict:
-    t0 = time.time()
+    t0 = time.monotonic_ns()
     trace_path = f"{DEBUG_DIR}/trace-{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}.zip"
-    with sync_playwright() as p:
-        browser, context = _new_context(p, use_saved_state=True)
+    context = _get_context()
+    context.tracing.start(screenshots=True, snapshots=True, sources=True)
+    page = context.new_page()
+    try:
+        _goto_with_retries(page, url)
+        _click_consent_if_present(page)
+        context.tracing.stop(path=trace_path)
+        return {"ok": True, "trace": trace_path, "final_url": page.url, "title": page.title(),
+                "logged_in_flag": _is_logged_in(page), "elapsed_ms": _elapsed_ms(t0)}
+    finally:
+        page.close()
         try:
-            context.tracing.start(screenshots=True, snapshots=True, sources=True)
-            page = context.new_page()
-            _goto_with_retries(page, url)
-            _click_consent_if_present(page)
-            context.tracing.stop(path=trace_path)
-            return {"ok": True, "trace": trace_path, "final_url": page.url, "title": page.title(),
-                    "logged_in_flag": _is_logged_in(page), "elapsed_ms": int((time.time() - t0) * 1000)}
-        finally:
-            context.close(); browser.close()
+            context.tracing.stop()
+        except Exception:
+            pass
 
 def debug_myaccount() -> dict:
-    t0 = time.time()
-    with sync_playwright() as p:
-        browser, context = _new_context(p, use_saved_state=True)
-        page = context.new_page()
-        try:
-            start = "https://www.tcgplayer.com/myaccount/"
-            _goto_with_retries(page, start)
-            _click_consent_if_present(page)
-            final = page.url
-            anti = _anti_bot_check(page)
-            arts = _save_debug(page, "debug-myaccount")
-            return {"ok": True, "start_url": start, "final_url": final,
-                    "redirected_to_login": ("login" in final.lower()),
-                    "logged_in_flag": _is_logged_in(page), "anti_bot": anti,
-                    "artifacts": arts, "elapsed_ms": int((time.time() - t0) * 1000)}
-        finally:
-            context.close(); browser.close()
+    t0 = time.monotonic_ns()
+    context = _get_context()
+    page = context.new_page()
+    try:
+        start = "https://www.tcgplayer.com/myaccount/"
+        _goto_with_retries(page, start)
+        _click_consent_if_present(page)
+        final = page.url
+        anti = _anti_bot_check(page)
+        arts = _save_debug(page, "debug-myaccount")
+        return {"ok": True, "start_url": start, "final_url": final,
+                "redirected_to_login": ("login" in final.lower()),
+                "logged_in_flag": _is_logged_in(page), "anti_bot": anti,
+                "artifacts": arts, "elapsed_ms": _elapsed_ms(t0)}
+    finally:
+        page.close()
 
 def debug_js() -> dict:
     """Confirm JS/runtime signals and whether <noscript> is present on homepage."""
-    t0 = time.time()
-    with sync_playwright() as p:
-        browser, context = _new_context(p, use_saved_state=True)
-        page = context.new_page()
-        try:
-            page.goto("https://www.tcgplayer.com/", wait_until="domcontentloaded", timeout=30000)
-            _click_consent_if_present(page)
-            info = page.evaluate("""
-                () => ({
-                  ua: navigator.userAgent,
-                  platform: navigator.platform,
-                  languages: navigator.languages,
-                  webdriver: navigator.webdriver,
-                  hasWindowChrome: !!window.chrome,
-                  jsTypeofWindow: typeof window,
-                })
-            """)
-            noscript_present = page.locator("noscript").count() > 0
-            return {"ok": True, "info": info, "noscript_present_in_dom": bool(noscript_present),
-                    "elapsed_ms": int((time.time() - t0) * 1000)}
-        finally:
-            context.close(); browser.close()
+    t0 = time.monotonic_ns()
+    context = _get_context()
+    page = context.new_page()
+    try:
+        page.goto("https://www.tcgplayer.com/", wait_until="domcontentloaded", timeout=30000)
+        _click_consent_if_present(page)
+        info = page.evaluate("""
+            () => ({
+              ua: navigator.userAgent,
+              platform: navigator.platform,
+              languages: navigator.languages,
+              webdriver: navigator.webdriver,
+              hasWindowChrome: !!window.chrome,
+              jsTypeofWindow: typeof window,
+            })
+        """)
+        noscript_present = page.locator("noscript").count() > 0
+        return {"ok": True, "info": info, "noscript_present_in_dom": bool(noscript_present),
+                "elapsed_ms": _elapsed_ms(t0)}
+    finally:
+        page.close()
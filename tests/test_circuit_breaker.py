@@ -0,0 +1,90 @@
+import unittest
+from unittest import mock
+
+try:
+    from scripts import one_shot
+except ImportError:  # playwright/lxml are only installed in the scraper image
+    one_shot = None
+
+
+@unittest.skipIf(one_shot is None, "scraper dependencies not installed")
+class CircuitBreakerTest(unittest.TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch.object(one_shot.time, "monotonic", lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_disabled_never_opens(self):
+        breaker = one_shot._CircuitBreaker(0, 60)
+        for _ in range(10):
+            self.assertIs(breaker.allow(), False)
+            breaker.record(False, False)
+        self.assertIs(breaker.allow(), False)
+
+    def test_opens_after_threshold_failures(self):
+        breaker = one_shot._CircuitBreaker(3, 60)
+        for _ in range(2):
+            breaker.record(False, breaker.allow())
+        self.assertIs(breaker.allow(), False)
+        breaker.record(False, False)
+        self.assertIsNone(breaker.allow())
+        self.now += 59
+        self.assertIsNone(breaker.allow())
+
+    def test_success_resets_the_count(self):
+        breaker = one_shot._CircuitBreaker(2, 60)
+        breaker.record(False, False)
+        breaker.record(True, False)
+        breaker.record(False, False)
+        self.assertIs(breaker.allow(), False)
+
+    def test_half_open_lets_one_probe_through(self):
+        breaker = one_shot._CircuitBreaker(1, 60)
+        breaker.record(False, False)
+        self.now += 60
+        self.assertIs(breaker.allow(), True)
+        self.assertIsNone(breaker.allow())
+        # A call that was already in flight must not end the probe
+        breaker.record(False, False)
+        self.assertIsNone(breaker.allow())
+        breaker.record(True, True)
+        self.assertIs(breaker.allow(), False)
+
+    def test_failed_probe_rearms_the_cooldown(self):
+        breaker = one_shot._CircuitBreaker(1, 60)
+        breaker.record(False, False)
+        self.now += 60
+        self.assertIs(breaker.allow(), True)
+        breaker.record(False, True)
+        self.assertIsNone(breaker.allow())
+        self.now += 60
+        self.assertIs(breaker.allow(), True)
+
+    def test_neutral_outcome_ends_probe_without_closing(self):
+        breaker = one_shot._CircuitBreaker(1, 60)
+        breaker.record(False, False)
+        self.now += 60
+        self.assertIs(breaker.allow(), True)
+        breaker.record(None, True)
+        self.assertIs(breaker.allow(), True)
+
+
+@unittest.skipIf(one_shot is None, "scraper dependencies not installed")
+class OriginOutcomeTest(unittest.TestCase):
+    def test_only_tcgplayer_hosts_count(self):
+        self.assertTrue(one_shot._is_origin_url("https://www.tcgplayer.com/product/1"))
+        self.assertTrue(one_shot._is_origin_url("https://TCGPlayer.com/"))
+        self.assertFalse(one_shot._is_origin_url("https://nonexistent.invalid/"))
+        self.assertFalse(one_shot._is_origin_url("https://tcgplayer.com.evil.example/"))
+
+    def test_caller_errors_are_neutral(self):
+        self.assertIs(one_shot._origin_outcome({"error": None}), True)
+        self.assertIs(one_shot._origin_outcome({"error": "timeout_dialog"}), True)
+        self.assertIs(one_shot._origin_outcome({"error": "timeout_nav", "reason": "Timeout 60000ms exceeded"}), False)
+        self.assertIsNone(one_shot._origin_outcome(
+            {"error": "timeout_nav", "reason": "net::ERR_NAME_NOT_RESOLVED at https://x.invalid/"}))
+
+
+if __name__ == "__main__":
+    unittest.main()